@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the log download paths, run against FakeFlipper.
+
+Every transfer mode of download_log_via_cli() pulls a generated
+sensor_log.csv of each requested size over a pty, and the result is checked
+against the original bytes. With --check the exit status is non-zero if
+any transfer fails or comes back different, which is what CI runs.
+
+    python bench_transport.py --rows 1000 10000 100000 --latency 0.0005
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from fake_flipper import FakeFlipper, generate_sensor_log
+from flipper_cli import LOG_REMOTE_PATH
+from retrieve_and_analyze import download_log_via_cli
+
+MODES = ['framed', 'async', 'chunked', 'poll']
+
+
+def _matches(mode, original, downloaded):
+    if mode == 'poll':
+        # The poll transfer rewrites line endings and drops blank lines.
+        return downloaded.split() == original.split()
+    return downloaded == original
+
+
+def run_one(mode, log, fake_options):
+    """Download `log` once with `mode`; returns (seconds, ok, detail)."""
+    with tempfile.TemporaryDirectory() as tmp, FakeFlipper({LOG_REMOTE_PATH: log}, **fake_options) as fake:
+        output_path = os.path.join(tmp, 'sensor_log.csv')
+        quiet = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(quiet):
+            ok = download_log_via_cli(output_path, mode, port=fake.port)
+        seconds = time.perf_counter() - start
+        if not ok:
+            return seconds, False, quiet.getvalue().strip().splitlines()[-1]
+        with open(output_path, 'rb') as f:
+            if not _matches(mode, log, f.read()):
+                return seconds, False, "content mismatch"
+        detail = f"{fake.corrupted_chunks} chunks corrupted" if fake.corrupted_chunks else ""
+        return seconds, True, detail
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark log transfers against a fake Flipper")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="log sizes to test, in samples")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--baud', type=int, default=None)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--corrupt', type=float, default=0.0)
+    parser.add_argument('--check', action='store_true',
+                        help="exit non-zero if any transfer fails or differs")
+    args = parser.parse_args(argv)
+
+    fake_options = {
+        'baud': args.baud,
+        'latency': args.latency,
+        'jitter': args.jitter,
+        'corrupt': args.corrupt,
+    }
+
+    print(f"{'ROWS':>8} {'BYTES':>10} {'MODE':8} {'SECONDS':>8} {'KB/s':>9}  RESULT")
+    print("-" * 64)
+    failures = 0
+    for rows in args.rows:
+        log = generate_sensor_log(rows)
+        for mode in args.modes:
+            seconds, ok, detail = run_one(mode, log, fake_options)
+            rate = len(log) / 1024 / seconds if seconds else 0
+            result = "ok" if ok else "FAILED"
+            if detail:
+                result += f" ({detail})"
+            print(f"{rows:8d} {len(log):10d} {mode:8} {seconds:8.3f} {rate:9.1f}  {result}")
+            failures += not ok
+
+    if args.check and failures:
+        print(f"\n{failures} transfer(s) failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Binary column cache next to the sensor log.
+
+The first analysis of `sensor_log.csv` parses the columns it asks for and
+stores them in `sensor_log.csv.cols/`: one raw file per column (float32,
+or uint32 for timestamp_ms/sample_num), a byte-per-row `.bad` file marking
+cells that failed to parse, and `meta.json`. Later runs memory-map those
+files instead of parsing text; a column nobody asked for before is parsed
+then and added.
+
+The cache is keyed by the log's size, mtime and a SHA-256 fingerprint of
+the first and last block of the bytes it covers. When the log has only
+grown (the fingerprint of the cached prefix still matches) just the new
+rows are parsed and appended; anything else rebuilds the cache. Only
+newline-terminated rows are cached, so a torn final write is picked up
+once the app finishes the line.
+"""
+
+import hashlib
+import json
+import os
+
+from sensor_log import (
+    ANALYSIS_COLUMNS,
+    INT_COLUMNS,
+    _empty_columns,
+    load_columns_numpy,
+    np,
+    read_header,
+)
+
+CACHE_SUFFIX = '.cols'
+CACHE_VERSION = 3
+FINGERPRINT_BLOCK = 64 * 1024
+
+
+def cache_path(csv_path):
+    return csv_path + CACHE_SUFFIX
+
+
+def _dtype(column):
+    return np.uint32 if column in INT_COLUMNS else np.float32
+
+
+def _fingerprint(path, size, block_size=FINGERPRINT_BLOCK):
+    """SHA-256 over the first and last `block_size` bytes of path[:size]."""
+    digest = hashlib.sha256(str(size).encode())
+    with open(path, 'rb') as f:
+        digest.update(f.read(min(block_size, size)))
+        if size > block_size:
+            f.seek(max(block_size, size - block_size))
+            digest.update(f.read(size - f.tell()))
+    return digest.hexdigest()
+
+
+def _complete_size(path, size, block_size=FINGERPRINT_BLOCK):
+    """Offset just past the last newline in path[:size] (0 if there is none)."""
+    with open(path, 'rb') as f:
+        end = size
+        while end > 0:
+            start = max(0, end - block_size)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b'\n')
+            if newline >= 0:
+                return start + newline + 1
+            end = start
+    return 0
+
+
+def _load_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != CACHE_VERSION:
+        return None
+    return meta
+
+
+def _save_meta(cache_dir, meta):
+    path = os.path.join(cache_dir, 'meta.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(meta, f)
+    os.replace(path + '.tmp', path)
+
+
+def _column_file(cache_dir, column):
+    return os.path.join(cache_dir, column + ('.u32' if column in INT_COLUMNS else '.f32'))
+
+
+def _append_rows(csv_path, cache_dir, meta, columns, rows, start, end):
+    """
+    Parse `columns` of csv[start:end] and append them to their column and
+    mask files after the first `rows` rows. Returns the number of rows added.
+    """
+    if end > start and columns:
+        # np.loadtxt is about twice as fast as the mmap scanner; it falls back
+        # to the masked scan when the range has a bad cell.
+        data = load_columns_numpy(csv_path, columns, start=start, end=end)
+        added = len(data[columns[0]])
+    else:
+        data, added = None, 0
+    for column in columns:
+        itemsize = np.dtype(_dtype(column)).itemsize
+        # Truncating drops anything written after the last meta.json update.
+        with open(_column_file(cache_dir, column), 'ab') as f:
+            f.truncate(rows * itemsize)
+            if added:
+                np.ma.filled(data[column], 0).astype(_dtype(column)).tofile(f)
+        with open(_column_file(cache_dir, column) + '.bad', 'ab') as f:
+            f.truncate(rows)
+            if added:
+                bad = np.ma.getmaskarray(data[column])
+                bad.tofile(f)
+                meta['invalid'][column] = meta['invalid'].get(column, 0) + int(bad.sum())
+    return added
+
+
+def update_cache(csv_path, columns=ANALYSIS_COLUMNS):
+    """
+    Bring the column cache of `csv_path` up to date, adding any of `columns`
+    it doesn't hold yet, and return its metadata. Only requested columns
+    are ever parsed. Raises OSError if the cache directory can't be written.
+    """
+    cache_dir = cache_path(csv_path)
+    stat = os.stat(csv_path)
+    meta = _load_meta(cache_dir)
+    changed = False
+
+    if meta is not None and (stat.st_size != meta['size'] or stat.st_mtime_ns != meta['mtime_ns']):
+        # Appending is only safe if the log grew; a same-size rewrite (an
+        # in-place edit of a few digits) would otherwise keep serving the
+        # old values with no new rows to parse.
+        if (stat.st_size <= meta['size']
+                or _fingerprint(csv_path, meta['parsed_bytes']) != meta['fingerprint']):
+            meta = None
+        else:
+            complete = _complete_size(csv_path, stat.st_size)
+            meta['rows'] += _append_rows(csv_path, cache_dir, meta, meta['columns'], meta['rows'],
+                                         meta['parsed_bytes'], complete)
+            meta.update(parsed_bytes=complete, size=stat.st_size, mtime_ns=stat.st_mtime_ns,
+                        fingerprint=_fingerprint(csv_path, complete))
+            changed = True
+
+    if meta is None:
+        os.makedirs(cache_dir, exist_ok=True)
+        complete = _complete_size(csv_path, stat.st_size)
+        meta = {
+            'version': CACHE_VERSION,
+            'header': read_header(csv_path),
+            'columns': [],
+            'rows': 0,
+            'parsed_bytes': complete,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'fingerprint': _fingerprint(csv_path, complete),
+            'invalid': {},
+        }
+        changed = True
+
+    missing = [c for c in columns if c in meta['header'] and c not in meta['columns']]
+    if missing:
+        # A new column is parsed over the cached rows only. Both loaders
+        # drop exactly the incomplete rows, so it lines up with the others.
+        added = _append_rows(csv_path, cache_dir, meta, missing, 0, 0, meta['parsed_bytes'])
+        if not meta['columns']:
+            meta['rows'] = added
+        elif added != meta['rows']:
+            raise OSError(f"{csv_path} changed while its column cache was extended")
+        meta['columns'] += missing
+        changed = True
+
+    if changed:
+        _save_meta(cache_dir, meta)
+    return meta
+
+
+def load_cached_columns(csv_path, columns=ANALYSIS_COLUMNS):
+    """
+    Return the requested columns as read-only memory-mapped arrays,
+    building or extending the cache first if the log changed or a column
+    isn't cached yet. Columns with unparseable cells come back as masked
+    arrays.
+    """
+    return map_columns(csv_path, update_cache(csv_path, columns), columns)
+
+
+def map_columns(csv_path, meta, columns):
+    """Memory-map `columns` as of the cache state `meta` from update_cache()."""
+    cache_dir = cache_path(csv_path)
+    result = _empty_columns(columns)
+    for column in columns:
+        if column in meta['columns']:
+            if meta['rows']:
+                path = _column_file(cache_dir, column)
+                values = np.memmap(path, dtype=_dtype(column), mode='r', shape=(meta['rows'],))
+                if meta['invalid'].get(column):
+                    bad = np.memmap(path + '.bad', dtype=bool, mode='r', shape=(meta['rows'],))
+                    values = np.ma.MaskedArray(values, mask=bad)
+                result[column] = values
+            else:
+                result[column] = np.empty(0, dtype=_dtype(column))
+    return result
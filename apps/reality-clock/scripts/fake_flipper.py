@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+A stand-in for the Flipper Zero CLI on a Linux/macOS pseudo-terminal.
+
+FakeFlipper serves the `storage` commands the retrieval code uses (read,
+read_chunks, stat, md5, timestamp, list, remove) from an in-memory file
+table, so the download paths can be benchmarked and exercised without
+hardware. Line handling follows the real CLI: characters are echoed as
+typed, CR runs the command, LF is ignored at the prompt, and read_chunks
+waits for one key per chunk.
+
+The link can be slowed down and made unreliable: `baud` caps throughput at
+baud/10 bytes/s, every `write_size` output chunk costs `latency` plus up to
+`jitter` seconds, and `corrupt` is the probability that a chunk of file
+payload gets one byte flipped.
+
+Run it directly to get a port for manual testing:
+
+    python fake_flipper.py --rows 100000 --latency 0.001
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import select
+import threading
+import time
+import tty
+
+from flipper_cli import LOG_REMOTE_PATH
+
+LOG_HEADER = ("timestamp_ms,sample_num,rssi_315,rssi_433,rssi_868,temperature,voltage,"
+              "phi_current,phi_baseline,phi_short,stability,match_pct\n")
+BANNER = b"\r\n              _.-------.._\r\n  Welcome to Flipper Zero Command Line Interface!\r\n\r\n>: "
+PROMPT = b"\r\n>: "
+WRITE_TIMEOUT = 1.0  # give up on a response nobody is reading
+
+
+def generate_sensor_log(rows, seed=0, interval_ms=1000):
+    """Return `rows` samples in the exact format of debug_log_write(), as bytes."""
+    rng = random.Random(seed)
+    lines = [LOG_HEADER]
+    phi_baseline = phi_short = None
+    for i in range(rows):
+        rssi_315 = rng.gauss(-99.4, 2.75)
+        rssi_433 = rng.gauss(-96.1, 1.65)
+        rssi_868 = rng.gauss(-112.8, 1.85)
+        temperature = 31.0 + 2.0 * i / max(rows, 1) + rng.gauss(0, 0.3)
+        voltage = 4.1 - 0.3 * i / max(rows, 1) + rng.gauss(0, 0.005)
+        lf, hf, uhf = rssi_315 + 120.0, rssi_433 + 120.0, rssi_868 + 120.0
+        phi = (lf * uhf) / (hf * hf)
+        phi_baseline = phi if phi_baseline is None else 0.05 * phi + 0.95 * phi_baseline
+        phi_short = phi if phi_short is None else 0.15 * phi + 0.85 * phi_short
+        stability = max(0.0, 100.0 - abs(phi_short - phi_baseline) / phi_baseline * 1000.0)
+        match_pct = max(0.0, 100.0 - abs(phi - phi_baseline) / phi_baseline * 100.0)
+        lines.append(
+            f"{i * interval_ms + rng.randrange(3)},{i + 1},{rssi_315:.2f},{rssi_433:.2f},"
+            f"{rssi_868:.2f},{temperature:.2f},{voltage:.3f},{phi:.6f},{phi_baseline:.6f},"
+            f"{phi_short:.6f},{stability:.2f},{match_pct:.2f}\n")
+    return ''.join(lines).encode()
+
+
+class FakeFlipper:
+    """
+    Serve a fake Flipper CLI on a pty until stop() is called.
+
+        with FakeFlipper({LOG_REMOTE_PATH: generate_sensor_log(1000)}) as fake:
+            download_log_via_cli(path, port=fake.port)
+    """
+
+    def __init__(self, files=None, baud=None, latency=0.0, jitter=0.0, corrupt=0.0,
+                 write_size=512, seed=0):
+        self.files = dict(files or {})
+        self.timestamps = {path: int(time.time()) for path in self.files}
+        self.baud = baud
+        self.latency = latency
+        self.jitter = jitter
+        self.corrupt = corrupt
+        self.write_size = write_size
+        self.corrupted_chunks = 0
+        self._rng = random.Random(seed)
+        self._master = None
+        self._slave = None
+        self._thread = None
+        self._running = False
+        self._line = bytearray()
+        self._chunks = None  # (data, offset, chunk size) while read_chunks waits for a key
+        self.port = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        os.set_blocking(self._master, False)
+        self.port = os.ttyname(self._slave)
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        self._send(BANNER)
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def put_file(self, path, data):
+        self.files[path] = data
+        self.timestamps[path] = int(time.time())
+
+    # -- output --------------------------------------------------------------
+
+    def _send(self, data, payload=False):
+        """Write to the host, applying the configured link characteristics."""
+        for start in range(0, len(data), self.write_size):
+            chunk = data[start:start + self.write_size]
+            if payload and self.corrupt and self._rng.random() < self.corrupt:
+                chunk = bytearray(chunk)
+                chunk[self._rng.randrange(len(chunk))] ^= 0x5A
+                chunk = bytes(chunk)
+                self.corrupted_chunks += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0)
+            if self.baud:
+                delay += len(chunk) * 10 / self.baud
+            if delay:
+                time.sleep(delay)
+            if not self._write_all(chunk):
+                return False
+        return True
+
+    def _write_all(self, data):
+        view = memoryview(data)
+        while view:
+            _, writable, _ = select.select([], [self._master], [], WRITE_TIMEOUT)
+            if not writable or not self._running:
+                return False
+            written = os.write(self._master, view)
+            view = view[written:]
+        return True
+
+    # -- input ---------------------------------------------------------------
+
+    def _serve(self):
+        while self._running:
+            readable, _, _ = select.select([self._master], [], [], 0.05)
+            if not readable:
+                continue
+            try:
+                data = os.read(self._master, 4096)
+            except (BlockingIOError, OSError):
+                continue
+            for byte in data:
+                self._on_key(byte)
+
+    def _on_key(self, byte):
+        if self._chunks is not None:
+            self._next_chunk()
+        elif byte == 0x0D:
+            self._send(b"\r\n")
+            line = self._line.decode('ascii', errors='ignore').strip()
+            self._line.clear()
+            self._execute(line)
+        elif byte in (0x08, 0x7F):
+            if self._line:
+                self._line.pop()
+                self._send(b"\x08 \x08")
+        elif 0x20 <= byte < 0x7F:
+            self._line.append(byte)
+            self._send(bytes([byte]))
+
+    # -- commands ------------------------------------------------------------
+
+    def _execute(self, line):
+        if not line:
+            self._send(PROMPT)
+            return
+        argv = line.split()
+        if argv[0] != 'storage' or len(argv) < 3:
+            self._send(f"`{argv[0]}` command not found\r\n".encode() if argv[0] != 'storage'
+                       else b"Usage:\r\nstorage <cmd> <path> <args>\r\n")
+            self._send(PROMPT)
+            return
+
+        cmd, path, args = argv[1], argv[2], argv[3:]
+        handler = getattr(self, f"_cmd_{cmd}", None)
+        if handler is None:
+            self._send(b"Usage:\r\nstorage <cmd> <path> <args>\r\n")
+        elif cmd != 'list' and path not in self.files:
+            self._send(b"Storage error: file/dir not exist\r\n")
+        elif handler(path, args) is False:
+            return  # read_chunks is waiting for a key
+        self._send(PROMPT)
+
+    def _cmd_read(self, path, args):
+        data = self.files[path]
+        self._send(f"Size: {len(data)}\r\n".encode())
+        self._send(data, payload=True)
+        self._send(b"\r\n")
+
+    def _cmd_read_chunks(self, path, args):
+        data = self.files[path]
+        chunk_size = int(args[0]) if args and args[0].isdigit() else 0
+        self._send(f"Size: {len(data)}\r\n".encode())
+        if chunk_size and data:
+            self._chunks = (data, 0, chunk_size)
+            self._send(b"\r\nReady?\r\n")
+            return False
+        self._send(b"\r\n")
+
+    def _next_chunk(self):
+        data, offset, chunk_size = self._chunks
+        self._send(data[offset:offset + chunk_size], payload=True)
+        offset += chunk_size
+        if offset < len(data):
+            self._chunks = (data, offset, chunk_size)
+            self._send(b"\r\nReady?\r\n")
+        else:
+            self._chunks = None
+            self._send(b"\r\n")
+            self._send(PROMPT)
+
+    def _cmd_stat(self, path, args):
+        self._send(f"File, size: {len(self.files[path])}b\r\n".encode())
+
+    def _cmd_md5(self, path, args):
+        self._send(hashlib.md5(self.files[path]).hexdigest().encode() + b"\r\n")
+
+    def _cmd_timestamp(self, path, args):
+        self._send(f"Timestamp {self.timestamps[path]}\r\n".encode())
+
+    def _cmd_remove(self, path, args):
+        del self.files[path]
+        del self.timestamps[path]
+
+    def _cmd_list(self, path, args):
+        prefix = path.rstrip('/') + '/'
+        names = sorted(p[len(prefix):] for p in self.files if p.startswith(prefix))
+        dirs = sorted({n.split('/')[0] for n in names if '/' in n})
+        files = [n for n in names if '/' not in n]
+        if not dirs and not files:
+            self._send(b"\tEmpty\r\n")
+        for name in dirs:
+            self._send(f"\t[D] {name}\r\n".encode())
+        for name in files:
+            self._send(f"\t[F] {name} {len(self.files[prefix + name])}b\r\n".encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Flipper CLI on a pty")
+    parser.add_argument('--rows', type=int, default=10000, help="samples in the generated sensor_log.csv")
+    parser.add_argument('--baud', type=int, default=None, help="cap throughput at baud/10 bytes/s")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds per output chunk")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra random seconds per output chunk")
+    parser.add_argument('--corrupt', type=float, default=0.0, help="probability a payload chunk is corrupted")
+    args = parser.parse_args()
+
+    files = {LOG_REMOTE_PATH: generate_sensor_log(args.rows)}
+    with FakeFlipper(files, args.baud, args.latency, args.jitter, args.corrupt) as fake:
+        print(f"Fake Flipper CLI on {fake.port} ({len(files[LOG_REMOTE_PATH])} byte log). Ctrl-C to stop.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Download the sensor log from every attached Flipper at once.
+
+All devices share one event loop via AsyncFlipperCli, so a fleet pull takes
+about as long as the slowest device. Each log lands in
+<output_root>/<device serial>/sensor_log.csv.
+"""
+
+import asyncio
+import os
+import re
+import time
+
+from flipper_async import AsyncFlipperCli
+from flipper_cli import CLI_TIMEOUT, LOG_REMOTE_PATH
+from flipper_ports import list_flippers
+
+
+def device_log_path(output_root, port, serial_number):
+    """<output_root>/<serial>/sensor_log.csv, falling back to the port name."""
+    name = re.sub(r'[^A-Za-z0-9_.-]', '_', serial_number or os.path.basename(port))
+    return os.path.join(output_root, name, 'sensor_log.csv')
+
+
+async def _pull_one(port, serial_number, output_root, remote_path, timeout):
+    result = {
+        'port': port,
+        'serial': serial_number,
+        'path': None,
+        'bytes': 0,
+        'seconds': 0.0,
+        'error': None,
+    }
+    output_path = device_log_path(output_root, port, serial_number)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    start = time.perf_counter()
+    try:
+        async with AsyncFlipperCli(port, timeout=timeout) as cli:
+            result['bytes'] = await cli.download(output_path, remote_path)
+        result['path'] = output_path
+    except Exception as e:
+        result['error'] = str(e) or type(e).__name__
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+async def fleet_download(devices, output_root, remote_path=LOG_REMOTE_PATH, timeout=CLI_TIMEOUT):
+    """
+    Download from every device in a {serial: port} map concurrently; returns
+    one result dict per device.
+    """
+    tasks = [
+        _pull_one(port, serial if serial != port else None, output_root, remote_path, timeout)
+        for serial, port in devices.items()
+    ]
+    return await asyncio.gather(*tasks)
+
+
+def print_fleet_summary(results, elapsed):
+    """Print per-device throughput and failures."""
+    print(f"\n{'DEVICE':24} {'BYTES':>12} {'SECONDS':>8} {'KB/s':>9}  STATUS")
+    print("-" * 70)
+    total = 0
+    for r in results:
+        name = r['serial'] or r['port']
+        rate = r['bytes'] / 1024 / r['seconds'] if r['seconds'] and r['bytes'] else 0
+        status = f"FAILED: {r['error']}" if r['error'] else "ok"
+        print(f"{name:24} {r['bytes']:12d} {r['seconds']:8.2f} {rate:9.1f}  {status}")
+        total += r['bytes']
+    failed = sum(1 for r in results if r['error'])
+    print("-" * 70)
+    print(f"{len(results) - failed}/{len(results)} devices, {total} bytes in {elapsed:.2f} s "
+          f"({total / 1024 / elapsed if elapsed else 0:.1f} KB/s aggregate)")
+
+
+def download_fleet(output_root, remote_path=LOG_REMOTE_PATH, timeout=CLI_TIMEOUT):
+    """Find every Flipper, pull all logs in parallel and print a summary."""
+    devices = list_flippers()
+    if not devices:
+        print("ERROR: No Flipper Zero found. Please connect them via USB.")
+        return []
+
+    print(f"Found {len(devices)} Flipper port(s): {', '.join(devices.values())}")
+    start = time.perf_counter()
+    results = asyncio.run(fleet_download(devices, output_root, remote_path, timeout))
+    print_fleet_summary(results, time.perf_counter() - start)
+    return results
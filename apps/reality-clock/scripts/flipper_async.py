@@ -0,0 +1,234 @@
+"""
+asyncio transport for the Flipper Zero CLI.
+
+Each AsyncFlipperCli owns one serial port. On POSIX the port's file
+descriptor is registered with the event loop, so any number of devices can
+share one loop without threads; elsewhere a small reader thread feeds the
+loop instead. Every read takes a timeout, which bounds how long the device
+may stay silent, replacing the fixed sleeps of the blocking path.
+"""
+
+import asyncio
+import os
+import threading
+
+from flipper_cli import (
+    CLI_BAUD,
+    CLI_PROMPT,
+    CLI_TIMEOUT,
+    LOG_REMOTE_PATH,
+    READ_BLOCK_SIZE,
+    FlipperCliError,
+)
+
+HIGH_WATER = 1024 * 1024  # stop reading the port until the consumer catches up
+
+
+class AsyncFlipperCli:
+    """One Flipper CLI connection driven by the running event loop."""
+
+    def __init__(self, port, baud=CLI_BAUD, timeout=CLI_TIMEOUT):
+        self.port = port
+        self.baud = baud
+        self.timeout = timeout
+        self._ser = None
+        self._loop = None
+        self._buffer = bytearray()
+        self._data = asyncio.Event()
+        self._error = None
+        self._reading = False
+        self._thread = None
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        import serial
+
+        self._loop = asyncio.get_running_loop()
+        # Opening can block briefly on some drivers; keep it off the loop.
+        self._ser = await asyncio.to_thread(
+            serial.Serial, self.port, self.baud, timeout=0 if os.name == 'posix' else 0.1)
+        if os.name == 'posix':
+            self._resume_reading()
+        else:
+            self._thread = threading.Thread(target=self._reader_thread, daemon=True)
+            self._thread.start()
+        try:
+            await self.sync_prompt()
+        except BaseException:
+            await self.close()
+            raise
+
+    async def close(self):
+        if self._ser is None:
+            return
+        self._pause_reading()
+        ser, self._ser = self._ser, None
+        await asyncio.to_thread(ser.close)
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+    # -- port reading ----------------------------------------------------
+
+    def _resume_reading(self):
+        if not self._reading and self._ser is not None and self._thread is None:
+            self._loop.add_reader(self._ser.fileno(), self._on_readable)
+            self._reading = True
+
+    def _pause_reading(self):
+        if self._reading:
+            self._loop.remove_reader(self._ser.fileno())
+            self._reading = False
+
+    def _on_readable(self):
+        try:
+            data = self._ser.read(self._ser.in_waiting or 1)
+        except Exception as e:
+            self._pause_reading()
+            self._fail(e)
+            return
+        self._feed(data)
+
+    def _reader_thread(self):
+        while self._ser is not None:
+            try:
+                data = self._ser.read(max(1, self._ser.in_waiting))
+            except Exception as e:
+                self._loop.call_soon_threadsafe(self._fail, e)
+                return
+            if data:
+                self._loop.call_soon_threadsafe(self._feed, data)
+
+    def _feed(self, data):
+        self._buffer += data
+        self._data.set()
+        if len(self._buffer) > HIGH_WATER:
+            self._pause_reading()
+
+    def _fail(self, error):
+        self._error = error
+        self._data.set()
+
+    async def _wait_for_data(self, timeout):
+        if self._error is not None:
+            raise FlipperCliError(f"{self.port}: {self._error}")
+        self._data.clear()
+        self._resume_reading()
+        try:
+            await asyncio.wait_for(self._data.wait(), timeout)
+        except asyncio.TimeoutError:
+            raise FlipperCliError(f"{self.port}: no data for {timeout} s") from None
+        if self._error is not None:
+            raise FlipperCliError(f"{self.port}: {self._error}")
+
+    def _take(self, size):
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        if len(self._buffer) < HIGH_WATER:
+            self._resume_reading()
+        return chunk
+
+    # -- primitives --------------------------------------------------------
+
+    async def write(self, data):
+        await asyncio.to_thread(self._ser.write, data)
+
+    async def read_until(self, marker, timeout=None):
+        """Return everything up to and including `marker`."""
+        timeout = self.timeout if timeout is None else timeout
+        start = 0
+        while True:
+            index = self._buffer.find(marker, start)
+            if index >= 0:
+                return self._take(index + len(marker))
+            start = max(0, len(self._buffer) - len(marker) + 1)
+            await self._wait_for_data(timeout)
+
+    async def iter_exact(self, size, timeout=None, block_size=READ_BLOCK_SIZE):
+        """Yield blocks of the next `size` bytes as they arrive."""
+        timeout = self.timeout if timeout is None else timeout
+        remaining = size
+        while remaining > 0:
+            if not self._buffer:
+                await self._wait_for_data(timeout)
+            block = self._take(min(remaining, block_size, len(self._buffer)))
+            remaining -= len(block)
+            yield block
+
+    async def sync_prompt(self, timeout=None):
+        """Discard banner output and wait for a fresh prompt."""
+        self._buffer.clear()
+        await self.write(b"\r\n")
+        await self.read_until(CLI_PROMPT, timeout)
+        while CLI_PROMPT in self._buffer:
+            await self.read_until(CLI_PROMPT, timeout)
+
+    # -- commands ------------------------------------------------------------
+
+    async def command(self, command, timeout=None):
+        """
+        Run a short CLI command and return its output lines (echo and prompt
+        stripped). Stale prompts are skipped by matching the command's echo,
+        as flipper_cli.read_response() does.
+        """
+        echo = command.encode()
+        async with self._lock:
+            await self.write(echo + b"\r\n")
+            while True:
+                response = await self.read_until(CLI_PROMPT, timeout)
+                if echo in response:
+                    break
+        text = response[response.index(echo) + len(echo):-len(CLI_PROMPT)]
+        lines = [line.strip() for line in text.decode('utf-8', errors='ignore').split('\n')]
+        return [line for line in lines if line]
+
+    async def stream_file(self, remote_path, timeout=None):
+        """
+        Async generator over the bytes of a file on the device, framed by the
+        `Size:` header. The first item yielded is the total size (an int).
+        """
+        async with self._lock:
+            await self.write(f"storage read {remote_path}\r\n".encode())
+            while True:
+                line = (await self.read_until(b'\n', timeout)).decode('utf-8', errors='ignore').strip()
+                if line.startswith('Size:'):
+                    size = int(line[len('Size:'):].strip())
+                    break
+                if 'error' in line.lower() or line.startswith('Usage'):
+                    raise FlipperCliError(f"{self.port}: {line}")
+            yield size
+            async for block in self.iter_exact(size, timeout):
+                yield block
+            await self.read_until(CLI_PROMPT, timeout)
+
+    async def download(self, output_path, remote_path=LOG_REMOTE_PATH, timeout=None):
+        """Download a file to `output_path`; returns the number of bytes written."""
+        part_path = output_path + '.part'
+        stream = self.stream_file(remote_path, timeout)
+        try:
+            size = await stream.__anext__()
+            with open(part_path, 'wb') as f:
+                async for block in stream:
+                    f.write(block)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        finally:
+            await stream.aclose()
+        os.replace(part_path, output_path)
+        return size
+
+
+async def download_log_async(port, output_path, remote_path=LOG_REMOTE_PATH,
+                             timeout=CLI_TIMEOUT):
+    """Open `port`, download the sensor log to `output_path` and close it again."""
+    async with AsyncFlipperCli(port, timeout=timeout) as cli:
+        return await cli.download(output_path, remote_path)
@@ -0,0 +1,309 @@
+"""
+Helpers for talking to the Flipper Zero CLI over its USB serial port.
+
+The CLI answers `storage read <path>` with a `Size: <n>` line followed by
+exactly <n> raw file bytes, so transfers can be framed by length instead of
+waiting for the line to go quiet.
+"""
+
+import re
+
+LOG_REMOTE_PATH = "/ext/apps_data/reality_clock/sensor_log.csv"
+CLI_BAUD = 230400
+CLI_TIMEOUT = 5
+CLI_PROMPT = b">: "
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class FlipperCliError(Exception):
+    """Raised when the Flipper CLI returns something we can't use."""
+
+
+def read_size_header(ser):
+    """
+    Consume the command echo and return the byte count from the `Size:` line.
+    Raises FlipperCliError if the CLI reports an error or goes silent first.
+    """
+    while True:
+        line = ser.read_until(b'\n')
+        if not line.endswith(b'\n'):
+            raise FlipperCliError("Timed out waiting for the Size: header")
+        text = line.decode('utf-8', errors='ignore').strip()
+        if text.startswith('Size:'):
+            try:
+                return int(text[len('Size:'):].strip())
+            except ValueError:
+                raise FlipperCliError(f"Malformed size header: {text!r}")
+        if 'error' in text.lower() or text.startswith('Usage'):
+            raise FlipperCliError(text)
+
+
+def read_exact(ser, size, out, block_size=READ_BLOCK_SIZE):
+    """
+    Copy exactly `size` bytes from the port into the writable `out`.
+    Returns the number of bytes copied, which is short only on a timeout.
+    """
+    remaining = size
+    while remaining > 0:
+        chunk = ser.read(min(remaining, block_size))
+        if not chunk:
+            break
+        out.write(chunk)
+        remaining -= len(chunk)
+    return size - remaining
+
+
+def drain_to_prompt(ser):
+    """Read and discard everything up to the next CLI prompt."""
+    return ser.read_until(CLI_PROMPT).endswith(CLI_PROMPT)
+
+
+def sync_prompt(ser):
+    """Discard any banner or stale output and leave the CLI at a fresh prompt."""
+    ser.reset_input_buffer()
+    ser.write(b"\r\n")
+    ser.flush()
+    if not drain_to_prompt(ser):
+        raise FlipperCliError("Timed out waiting for the CLI prompt")
+    while ser.in_waiting:
+        drain_to_prompt(ser)
+
+
+def read_response(ser, command):
+    """
+    Read the output of an already-sent `command` up to its prompt and return
+    the output lines (echo and prompt stripped). Stale prompts left over from
+    the banner are skipped by matching the command's echo.
+    """
+    echo = command.encode()
+    while True:
+        response = ser.read_until(CLI_PROMPT)
+        if not response.endswith(CLI_PROMPT):
+            raise FlipperCliError(f"Timed out waiting for `{command}` to finish")
+        if echo in response:
+            break
+    response = response[response.index(echo) + len(echo):-len(CLI_PROMPT)]
+    lines = [line.strip() for line in response.decode('utf-8', errors='ignore').split('\n')]
+    return [line for line in lines if line]
+
+
+def run_command(ser, command):
+    """
+    Run a short CLI command and return its output lines (echo and prompt
+    stripped). Not for bulk transfers; use read_size_header/read_exact there.
+    """
+    ser.write(command.encode() + b"\r\n")
+    ser.flush()
+    return read_response(ser, command)
+
+
+def _parse_stat(lines, path):
+    for line in lines:
+        match = re.search(r'size:\s*(\d+)', line, re.IGNORECASE)
+        if match:
+            return int(match.group(1))
+        if 'error' in line.lower():
+            raise FlipperCliError(line)
+    raise FlipperCliError(f"Could not stat {path}")
+
+
+def _parse_md5(lines, path):
+    for line in lines:
+        if re.fullmatch(r'[0-9a-fA-F]{32}', line):
+            return line.lower()
+        if 'error' in line.lower():
+            raise FlipperCliError(line)
+    raise FlipperCliError(f"Could not hash {path}")
+
+
+def _parse_timestamp(lines, path):
+    for line in lines:
+        match = re.search(r'(\d+)\s*$', line)
+        if match and 'timestamp' in line.lower():
+            return int(match.group(1))
+    return None
+
+
+def _parse_list(lines, path):
+    entries = []
+    for line in lines:
+        match = re.match(r'\[([DF])\]\s+(.*?)(?:\s+(\d+)b)?$', line)
+        if match:
+            kind, name, size = match.groups()
+            entries.append((name, kind == 'D', int(size) if size else None))
+        elif 'error' in line.lower():
+            raise FlipperCliError(line)
+    return entries
+
+
+def remote_size(ser, path):
+    """Return the size in bytes of a file on the Flipper (`storage stat`)."""
+    return _parse_stat(run_command(ser, f"storage stat {path}"), path)
+
+
+def remote_md5(ser, path):
+    """Return the hex MD5 of a file as computed on the Flipper (`storage md5`)."""
+    return _parse_md5(run_command(ser, f"storage md5 {path}"), path)
+
+
+def remote_timestamp(ser, path):
+    """
+    Return the modification timestamp of a file on the Flipper
+    (`storage timestamp`), or None if the firmware doesn't support it.
+    """
+    return _parse_timestamp(run_command(ser, f"storage timestamp {path}"), path)
+
+
+class FlipperCliSession:
+    """
+    A CLI connection that stays open across commands.
+
+    The port is opened and synced to the prompt once; after that each command
+    costs one round trip, and pipeline() sends a batch of commands in one
+    write and collects the responses in order (the CLI queues typed-ahead
+    input while it is busy).
+
+        with FlipperCliSession(port) as cli:
+            size = cli.stat(LOG_REMOTE_PATH)
+            with open(path, 'wb') as f:
+                cli.read(LOG_REMOTE_PATH, f)
+            cli.remove(LOG_REMOTE_PATH)
+    """
+
+    _PARSERS = {
+        'stat': _parse_stat,
+        'md5': _parse_md5,
+        'timestamp': _parse_timestamp,
+        'list': _parse_list,
+    }
+
+    def __init__(self, port, baud=CLI_BAUD, timeout=CLI_TIMEOUT):
+        self.port = port
+        self.baud = baud
+        self.timeout = timeout
+        self.ser = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        import serial
+
+        self.ser = serial.Serial(self.port, self.baud, timeout=self.timeout)
+        sync_prompt(self.ser)
+        return self
+
+    def close(self):
+        if self.ser is not None:
+            self.ser.close()
+            self.ser = None
+
+    def command(self, command):
+        """Run one command and return its output lines."""
+        return run_command(self.ser, command)
+
+    def pipeline(self, commands):
+        """Send all `commands` at once; return their output lines in order."""
+        self.ser.write(b''.join(c.encode() + b"\r\n" for c in commands))
+        self.ser.flush()
+        return [read_response(self.ser, c) for c in commands]
+
+    def storage(self, requests):
+        """
+        Pipeline several `(op, path)` storage queries, where op is one of
+        stat, md5, timestamp or list, and return the parsed results in order.
+        """
+        commands = [f"storage {op} {path}" for op, path in requests]
+        responses = self.pipeline(commands)
+        return [self._PARSERS[op](lines, path)
+                for (op, path), lines in zip(requests, responses)]
+
+    def stat(self, path):
+        return remote_size(self.ser, path)
+
+    def md5(self, path):
+        return remote_md5(self.ser, path)
+
+    def timestamp(self, path):
+        return remote_timestamp(self.ser, path)
+
+    def list(self, path):
+        """Return `(name, is_dir, size)` for each entry of a directory."""
+        return _parse_list(self.command(f"storage list {path}"), path)
+
+    def remove(self, path):
+        for line in self.command(f"storage remove {path}"):
+            if 'error' in line.lower():
+                raise FlipperCliError(line)
+
+    def read(self, path, out):
+        """Copy a file into the writable `out`; returns its size."""
+        command = f"storage read {path}"
+        self.ser.write(command.encode() + b"\r\n")
+        self.ser.flush()
+        size = read_size_header(self.ser)
+        received = read_exact(self.ser, size, out)
+        if not drain_to_prompt(self.ser) or received != size:
+            raise FlipperCliError(f"Transfer stopped at {received} of {size} bytes")
+        return size
+
+
+class CsvStreamParser:
+    """
+    Incremental line framer for raw CLI output containing the sensor CSV.
+
+    Bytes are fed in as they arrive; complete CSV rows (from the
+    `timestamp_ms` header up to the next prompt) are written straight to
+    `out`, so memory use is bounded by the longest line, not the log size.
+    `done` turns true as soon as the trailing prompt is seen.
+    """
+
+    def __init__(self, out, header_prefix=b'timestamp_ms'):
+        self.out = out
+        self.header_prefix = header_prefix
+        self.lines = 0
+        self.in_csv = False
+        self.done = False
+        self._partial = bytearray()
+
+    def feed(self, data):
+        if self.done:
+            return
+        self._partial += data
+        start = 0
+        while True:
+            end = self._partial.find(b'\n', start)
+            if end < 0:
+                break
+            self._line(bytes(self._partial[start:end]))
+            start = end + 1
+            if self.done:
+                break
+        del self._partial[:start]
+        # The prompt has no newline after it; catch it while it's still partial.
+        if self.in_csv and self._partial.lstrip().startswith(b'>'):
+            self.done = True
+
+    def close(self):
+        """Flush a final unterminated row, if any."""
+        if not self.done and self._partial:
+            self._line(bytes(self._partial))
+        self._partial.clear()
+        self.done = True
+
+    def _line(self, raw):
+        line = raw.decode('utf-8', errors='ignore').strip()
+        if not self.in_csv:
+            if not raw.startswith(self.header_prefix):
+                return
+            self.in_csv = True
+        if line.startswith('>') or 'storage' in line.lower():
+            self.done = True
+            return
+        if line:
+            self.out.write(line + '\n')
+            self.lines += 1
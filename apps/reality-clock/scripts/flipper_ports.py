@@ -0,0 +1,157 @@
+"""
+Flipper Zero port discovery.
+
+Ports are identified by their USB descriptors (STMicro VCP vendor/product
+ID, as used by the Flipper's CDC interface) and keyed by the USB serial
+string, so a specific device can be targeted no matter which tty it landed
+on. The serial -> port map is cached on disk for a short time so repeated
+runs skip re-enumerating the USB bus; a cached entry is only used once the
+device on that port still reports the same serial, so a tty that went to
+another Flipper is never mistaken for the old one. When pyserial can't
+enumerate descriptors the old device-name globbing is used instead.
+"""
+
+import glob
+import json
+import os
+import time
+
+FLIPPER_VID = 0x0483
+FLIPPER_PID = 0x5740
+CACHE_TTL = 30  # seconds
+CACHE_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'flipper-apps', 'ports.json')
+
+GLOB_PATTERNS = [
+    '/dev/cu.usbmodemflip*',  # macOS
+    '/dev/ttyACM*',  # Linux
+    'COM*',  # Windows
+]
+
+
+def _port_present(port):
+    # COM ports have no filesystem entry; trust the cache for those.
+    return os.name == 'nt' or os.path.exists(port)
+
+
+def _port_serial(port):
+    """The USB serial string of the device on `port` right now, or None."""
+    # On Linux the tty's sysfs node leads to the USB device without a bus scan.
+    interface = os.path.join('/sys/class/tty', os.path.basename(port), 'device')
+    if os.path.exists(interface):
+        try:
+            with open(os.path.join(os.path.realpath(interface), '..', 'serial')) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+    try:
+        from serial.tools import list_ports
+    except ImportError:
+        return None
+    for info in list_ports.comports():
+        if info.device == port:
+            return info.serial_number
+    return None
+
+
+def _cached_entry_valid(serial, port):
+    if serial == port:
+        # Globbed entry: there is no serial to confirm.
+        return _port_present(port)
+    return _port_serial(port) == serial
+
+
+def _load_cache():
+    try:
+        with open(CACHE_PATH) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - cache.get('time', 0) > CACHE_TTL:
+        return None
+    devices = cache.get('devices')
+    # An empty map is never cached, but don't trust one from an older version.
+    if not devices or not all(_cached_entry_valid(serial, port)
+                              for serial, port in devices.items()):
+        return None
+    return devices
+
+
+def _save_cache(devices):
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        tmp_path = CACHE_PATH + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'time': time.time(), 'devices': devices}, f)
+        os.replace(tmp_path, CACHE_PATH)
+    except OSError:
+        pass
+
+
+def _enumerate_usb():
+    """Return {serial: port} for every Flipper pyserial can see, or None."""
+    try:
+        from serial.tools import list_ports
+    except ImportError:
+        return None
+    devices = {}
+    for info in sorted(list_ports.comports(), key=lambda i: i.device):
+        if info.vid == FLIPPER_VID and info.pid == FLIPPER_PID:
+            devices[info.serial_number or info.device] = info.device
+    return devices
+
+
+def _enumerate_glob():
+    for pattern in GLOB_PATTERNS:
+        ports = sorted(glob.glob(pattern))
+        if ports:
+            # Prefer ports that name the Flipper, as the old lookup did.
+            ports.sort(key=lambda p: 'flip' not in p.lower())
+            return {port: port for port in ports}
+    return {}
+
+
+def list_flippers(refresh=False):
+    """
+    Return an ordered {serial: port} map of attached Flippers, served from
+    the on-disk cache unless it is stale, missing a port, or refresh=True.
+    The device names are only globbed when pyserial can't enumerate the bus.
+    """
+    devices = None if refresh else _load_cache()
+    if devices is None:
+        devices = _enumerate_usb()
+        if devices is None:
+            devices = _enumerate_glob()
+        if devices:
+            # Nothing attached isn't cached, so a Flipper plugged in right
+            # after is found on the next call.
+            _save_cache(devices)
+    return devices
+
+
+def find_flipper_port(serial=None):
+    """
+    Find the Flipper Zero's serial port, optionally the one whose USB serial
+    string is `serial`.
+    """
+    devices = list_flippers()
+    if serial is None:
+        return next(iter(devices.values()), None)
+    if serial not in devices:
+        # The device may have been plugged in since the cache was written.
+        devices = list_flippers(refresh=True)
+    return devices.get(serial)
+
+
+def find_flipper_ports():
+    """Find every attached Flipper Zero serial port."""
+    return list(list_flippers().values())
+
+
+def device_serial(port):
+    """Return the USB serial string of the device on `port`, if known."""
+    for serial, device in list_flippers().items():
+        if device == port and serial != port:
+            return serial
+    return None
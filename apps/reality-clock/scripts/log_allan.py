@@ -0,0 +1,171 @@
+"""
+Overlapping Allan deviation of logged columns.
+
+The Allan deviation at averaging time tau = m samples is the RMS change
+between adjacent m-sample averages, divided by sqrt(2). Unlike a single
+standard deviation it separates noise by time scale: white noise falls as
+tau**-0.5, flicker noise is flat, and random walk or drift rises. The
+minimum of the curve is the averaging length past which more averaging
+stops helping and starts smearing in drift, which is what the firmware's
+BUFFER_SIZE and EMA_ALPHA trade off.
+
+Every m-sample average is a difference of the cumulative sum, so each
+octave-spaced tau costs O(n) with NumPy (or in plain Python without it),
+and the whole curve O(n log n).
+"""
+
+import math
+from itertools import accumulate
+
+from log_rolling import BUFFER_SIZE
+from sensor_log import np
+
+SAMPLE_INTERVAL_NORMAL_MS = 1000  # reality_clock.c
+EMA_ALPHA = 0.05  # reality_clock.c
+
+
+def octave_taus(n):
+    """Averaging factors 1, 2, 4, ... up to a quarter of the sample count."""
+    taus = []
+    m = 1
+    while m <= (n - 1) // 4:
+        taus.append(m)
+        m *= 2
+    return taus
+
+
+def overlapping_adev(values, taus=None):
+    """
+    Overlapping Allan deviation of `values` at each averaging factor in
+    `taus` (octave_taus() by default). Returns (taus, deviations).
+    """
+    if np is None:
+        return overlapping_adev_python(values, taus)
+    x = np.asarray(values, dtype=np.float64)
+    taus = octave_taus(len(x)) if taus is None else [m for m in taus if 2 * m < len(x)]
+    # Centre first so the cumulative sum stays small on long logs.
+    s = np.concatenate(([0.0], np.cumsum(x - x.mean())))
+    deviations = []
+    for m in taus:
+        # Sum of samples [i+m, i+2m) minus sum of [i, i+m), for every i.
+        d = s[2 * m:] - 2.0 * s[m:-m] + s[:-2 * m]
+        deviations.append(math.sqrt(float(d @ d) / (2.0 * m * m * len(d))))
+    return taus, deviations
+
+
+def overlapping_adev_python(values, taus=None):
+    """Pure-Python equivalent of overlapping_adev()."""
+    values = list(values)
+    n = len(values)
+    taus = octave_taus(n) if taus is None else [m for m in taus if 2 * m < n]
+    shift = sum(values) / n if n else 0.0
+    s = [0.0] + list(accumulate(v - shift for v in values))
+    deviations = []
+    for m in taus:
+        total = 0.0
+        for i in range(n - 2 * m + 1):
+            d = s[i + 2 * m] - 2.0 * s[i + m] + s[i]
+            total += d * d
+        deviations.append(math.sqrt(total / (2.0 * m * m * (n - 2 * m + 1))))
+    return taus, deviations
+
+
+def sample_interval(timestamps):
+    """
+    Typical spacing of timestamp_ms in seconds: the median positive step,
+    so the 5 Hz calibration phase and gaps don't skew it. Falls back to
+    SAMPLE_INTERVAL_NORMAL_MS.
+    """
+    if hasattr(timestamps, 'compressed'):
+        timestamps = timestamps.compressed()
+    if np is not None:
+        steps = np.diff(np.asarray(timestamps, dtype=np.int64))
+        steps = np.sort(steps[steps > 0])
+    else:
+        timestamps = list(timestamps)
+        steps = sorted(b - a for a, b in zip(timestamps, timestamps[1:]) if b > a)
+    if len(steps) == 0:
+        return SAMPLE_INTERVAL_NORMAL_MS / 1000
+    return float(steps[len(steps) // 2]) / 1000
+
+
+def noise_floor(taus, deviations):
+    """
+    (tau, deviation) at the minimum of the curve, and whether the curve is
+    still falling at the longest tau (no drift seen within the capture).
+    """
+    best = min(range(len(deviations)), key=deviations.__getitem__)
+    return taus[best], deviations[best], best == len(deviations) - 1
+
+
+def _slope(taus, deviations, start, end):
+    """Log-log slope of the curve between two indices."""
+    if end <= start or deviations[start] <= 0 or deviations[end] <= 0:
+        return None
+    return (math.log(deviations[end] / deviations[start])
+            / math.log(taus[end] / taus[start]))
+
+
+def noise_type(slope):
+    """Dominant noise process for a log-log Allan deviation slope."""
+    if slope is None:
+        return 'n/a'
+    if slope < -0.25:
+        return 'white'
+    if slope < 0.25:
+        return 'flicker'
+    if slope < 0.75:
+        return 'random walk'
+    return 'drift'
+
+
+def print_allan_report(data, interval=SAMPLE_INTERVAL_NORMAL_MS / 1000):
+    """
+    Print the Allan deviation of each column at octave-spaced taus, where
+    each curve bottoms out, and the BUFFER_SIZE / EMA_ALPHA those floors
+    suggest. `interval` is the sample spacing in seconds.
+    """
+    curves = {}
+    for column, values in data.items():
+        if len(values) >= 9:
+            curves[column] = overlapping_adev(values)
+    if not curves:
+        return None
+
+    print(f"ALLAN DEVIATION (overlapping, {interval:g} s/sample):")
+    print("-" * 50)
+    taus = max((t for t, _ in curves.values()), key=len)
+    print(f"{'TAU (s)':>10} {'SAMPLES':>8}" + ''.join(f"{c:>14}" for c in curves))
+    for i, m in enumerate(taus):
+        cells = ''.join(f"{d[i]:14.6g}" if i < len(d) else f"{'-':>14}"
+                        for _, d in curves.values())
+        print(f"{m * interval:10g} {m:8d}{cells}")
+
+    print(f"\n{'':14} {'FLOOR TAU':>10} {'ADEV':>10} {'SHORT':>12} {'LONG':>12}")
+    floors = {}
+    for column, (t, d) in curves.items():
+        m, floor, falling = noise_floor(t, d)
+        floors[column] = (m, falling)
+        best = t.index(m)
+        short = noise_type(_slope(t, d, 0, best))
+        long = noise_type(_slope(t, d, best, len(d) - 1)) if not falling else '-'
+        print(f"{column:14} {m * interval:9g}s {floor:10.4g} {short:>12} {long:>12}"
+              + ("  (still falling)" if falling else ""))
+
+    print("\n/* Averaging lengths from the Allan deviation floors */")
+    bands = [floors[c] for c in ('rssi_315', 'rssi_433', 'rssi_868') if c in floors]
+    if bands:
+        m, falling = min(bands)
+        note = ("at least this; no drift seen within the capture" if falling
+                else f"shortest band floor; currently {BUFFER_SIZE}")
+        print(f"#define BUFFER_SIZE          {m}  /* {note} */")
+    if 'phi_current' in floors:
+        m, falling = floors['phi_current']
+        # An EMA with alpha averages white noise like a (2 - alpha) / alpha
+        # sample boxcar.
+        alpha = 2.0 / (m + 1)
+        note = ("at most this; no drift seen within the capture" if falling
+                else f"phi_current floor at {m} samples; currently {EMA_ALPHA}")
+        print(f"#define EMA_ALPHA            {alpha:.4g}f  /* {note} */")
+    print()
+    return curves
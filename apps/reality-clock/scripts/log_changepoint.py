@@ -0,0 +1,258 @@
+"""
+Change points in phi_current and stability.
+
+Two detectors for shifts of the mean:
+
+binary_segmentation() is the offline one. It splits the series where the
+split reduces the squared error the most, then keeps splitting the pieces
+(always the best remaining split first) while the reduction beats a
+BIC-style penalty. With cumulative sums of x and x**2, the cost of any
+segment is O(1), so finding the best split of a segment is one vectorized
+pass over it and the whole search is O(n log k) for k changes.
+
+Cusum is the online one: a two-sided Page CUSUM that sees one value at a
+time, raises an alarm once the accumulated deviation from the reference
+mean passes a threshold, and then re-learns the mean. It needs nothing but
+the current sums, so the same logic could run on the device.
+
+Neighbouring samples of phi_current are far from independent (it is a
+BUFFER_SIZE-sample average), so noise is measured on means of blocks of
+min_size samples rather than on single samples: the penalty uses the
+resulting long-run variance, and cusum_alarms() feeds Cusum block means.
+Wandering faster than a minimum segment therefore counts as noise.
+"""
+
+import heapq
+import math
+
+from log_rolling import BUFFER_SIZE
+from log_stats import RunningStats
+from sensor_log import have_numpy, np
+
+CHANGEPOINT_COLUMNS = ('phi_current', 'stability')
+MIN_SEGMENT = BUFFER_SIZE  # phi_current can't show a shorter regime
+MAX_CHANGES = 20
+PENALTY_FACTOR = 2.0  # penalty = factor * long-run variance * log(n), as in BIC
+CUSUM_DRIFT = 0.5  # sigmas of shift ignored per block
+CUSUM_THRESHOLD = 8.0  # sigmas of accumulated shift; ~1 false alarm per 6000 blocks
+CUSUM_WARMUP = 5  # block means that set the reference mean
+
+
+def block_means(x, block):
+    """Means of consecutive `block`-sample blocks of x (a partial tail is dropped)."""
+    count = len(x) // block
+    return x[:count * block].reshape(count, block).mean(axis=1)
+
+
+def noise_sigma(x, block=MIN_SEGMENT):
+    """
+    Robust standard deviation of the means of `block`-sample blocks of x,
+    from the MAD of differences between blocks two apart (neighbours share
+    part of a BUFFER_SIZE window), so a few level shifts barely move it.
+    On a clipped or piecewise-constant series most differences are exactly
+    0 and so is the MAD; the RMS of the differences is used instead.
+    """
+    means = block_means(x, max(1, block))
+    if len(means) < 3:
+        return 0.0
+    differences = means[2:] - means[:-2]
+    mad = float(np.median(np.abs(differences)))
+    if mad > 0:
+        return mad / (0.6745 * math.sqrt(2))
+    return float(np.sqrt(np.mean(differences * differences) / 2))
+
+
+def binary_segmentation(values, min_size=MIN_SEGMENT, max_changes=MAX_CHANGES,
+                        penalty=None):
+    """
+    Indices where the mean of `values` shifts, in order. `penalty` is the
+    reduction in squared error a split has to achieve; by default
+    PENALTY_FACTOR * log(n) times the long-run variance min_size * sigma**2,
+    with sigma from noise_sigma(). If all block means are equal (sigma 0)
+    there is nothing but rounding error to split on, and no change is
+    reported.
+    """
+    if not have_numpy():
+        raise RuntimeError("numpy is not installed (pip install numpy)")
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    if n < 2 * min_size:
+        return []
+    if penalty is None:
+        sigma = noise_sigma(x, min_size)
+        if sigma == 0:
+            return []
+        penalty = PENALTY_FACTOR * min_size * sigma ** 2 * math.log(n)
+    centred = x - x.mean()
+    s1 = np.concatenate(([0.0], np.cumsum(centred)))
+    s2 = np.concatenate(([0.0], np.cumsum(centred * centred)))
+
+    def cost(start, end):
+        total = s1[end] - s1[start]
+        return s2[end] - s2[start] - total * total / (end - start)
+
+    def best_split(start, end):
+        if end - start < 2 * min_size:
+            return None
+        t = np.arange(start + min_size, end - min_size + 1)
+        left = s2[t] - s2[start] - (s1[t] - s1[start]) ** 2 / (t - start)
+        right = s2[end] - s2[t] - (s1[end] - s1[t]) ** 2 / (end - t)
+        i = int(np.argmin(left + right))
+        return cost(start, end) - left[i] - right[i], int(t[i])
+
+    changes = []
+    candidates = []
+    split = best_split(0, n)
+    if split is not None:
+        heapq.heappush(candidates, (-split[0], split[1], 0, n))
+    while candidates and len(changes) < max_changes:
+        gain, t, start, end = heapq.heappop(candidates)
+        if -gain <= penalty:
+            break
+        changes.append(t)
+        for a, b in ((start, t), (t, end)):
+            split = best_split(a, b)
+            if split is not None:
+                heapq.heappush(candidates, (-split[0], split[1], a, b))
+    return sorted(changes)
+
+
+class Cusum:
+    """
+    Two-sided CUSUM for shifts of the mean, one value at a time. The
+    reference mean is learned from the first `warmup` values, and keeps
+    learning from every value until the next alarm restarts it. update()
+    returns (onset, direction) when an alarm fires, with onset the index
+    where the accumulated shift started, and None otherwise.
+    """
+
+    __slots__ = ('sigma', 'drift', 'threshold', 'warmup', 'index', 'reference',
+                 'high', 'low', 'high_start', 'low_start')
+
+    def __init__(self, sigma, drift=CUSUM_DRIFT, threshold=CUSUM_THRESHOLD, warmup=CUSUM_WARMUP):
+        self.sigma = sigma
+        self.drift = drift * sigma
+        self.threshold = threshold * sigma
+        self.warmup = warmup
+        self.index = -1
+        self._reset()
+
+    def _reset(self):
+        self.reference = RunningStats()
+        self.high = self.low = 0.0
+        self.high_start = self.low_start = self.index + 1
+
+    def update(self, x):
+        self.index += 1
+        if self.reference.count < self.warmup:
+            self.reference.add(x)
+            self.high_start = self.low_start = self.index + 1
+            return None
+        deviation = x - self.reference.mean
+        self.reference.add(x)
+        self.high = max(0.0, self.high + deviation - self.drift)
+        self.low = max(0.0, self.low - deviation - self.drift)
+        if self.high == 0.0:
+            self.high_start = self.index + 1
+        if self.low == 0.0:
+            self.low_start = self.index + 1
+        if self.high > self.threshold:
+            alarm = (self.high_start, +1)
+        elif self.low > self.threshold:
+            alarm = (self.low_start, -1)
+        else:
+            return None
+        self._reset()
+        return alarm
+
+
+def cusum_alarms(values, block=MIN_SEGMENT, drift=CUSUM_DRIFT, threshold=CUSUM_THRESHOLD,
+                 warmup=CUSUM_WARMUP):
+    """
+    Run Cusum over the `block`-sample means of a series. Returns the block
+    sigma and [(onset, alarm, direction)] with onset and alarm as sample
+    indices: the start of the block where the shift began and the end of
+    the block that raised the alarm.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    sigma = noise_sigma(values, block)
+    if sigma <= 0:
+        return sigma, []
+    detector = Cusum(sigma, drift, threshold, warmup)
+    alarms = []
+    for value in block_means(values, block).tolist():
+        alarm = detector.update(value)
+        if alarm is not None:
+            alarms.append((alarm[0] * block, (detector.index + 1) * block - 1, alarm[1]))
+    return sigma, alarms
+
+
+def segment_stats(values, changes):
+    """RunningStats of each segment between consecutive change points."""
+    bounds = [0] + list(changes) + [len(values)]
+    return [(a, b, RunningStats.from_values(values[a:b])) for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def _valid(values, timestamps):
+    """float64 values and their timestamps (ms), without masked or NaN cells."""
+    def as_float(v):
+        if isinstance(v, np.ma.MaskedArray):
+            return v.astype(np.float64).filled(np.nan)
+        return np.asarray(v, dtype=np.float64)
+    x = as_float(values)
+    t = as_float(timestamps)
+    ok = np.isfinite(x) & np.isfinite(t)
+    return x[ok], t[ok]
+
+
+def print_changepoint_report(data, timestamps, min_size=MIN_SEGMENT, max_changes=MAX_CHANGES):
+    """
+    Print the segments binary segmentation finds in each column, with
+    their statistics, and the alarms an online CUSUM raises over the same
+    data. `data` maps columns to values row-aligned with `timestamps` (ms).
+    """
+    if not have_numpy():
+        print("Change-point detection needs numpy (pip install numpy)\n")
+        return None
+    results = {}
+    for column in CHANGEPOINT_COLUMNS:
+        if column not in data:
+            continue
+        x, t = _valid(data[column], timestamps)
+        if len(x) < 2 * min_size:
+            continue
+        changes = binary_segmentation(x, min_size, max_changes)
+        sigma, alarms = cusum_alarms(x, min_size)
+        results[column] = {
+            'hours': (t - t[0]) / 3.6e6,
+            'sigma': sigma,
+            'changes': changes,
+            'segments': segment_stats(x, changes),
+            'alarms': alarms,
+        }
+    if not results:
+        return None
+
+    print(f"CHANGE POINTS (binary segmentation, segments of {min_size}+ samples):")
+    print("-" * 50)
+    for column, found in results.items():
+        hours = found['hours']
+        print(f"{column}: {len(found['changes'])} change(s), "
+              f"sigma of {min_size}-sample means {found['sigma']:.4g}")
+        print(f"{'FROM (h)':>10} {'TO (h)':>8} {'SAMPLES':>8} {'MEAN':>11} {'STD':>11} "
+              f"{'MIN':>11} {'MAX':>11}")
+        for a, b, stats in found['segments']:
+            print(f"{hours[a]:10.2f} {hours[b - 1]:8.2f} {stats.count:8d} {stats.mean:11.6g} "
+                  f"{stats.std:11.6g} {stats.min:11.6g} {stats.max:11.6g}")
+
+        alarms = found['alarms']
+        print(f"online CUSUM over block means (drift {CUSUM_DRIFT:g}, "
+              f"threshold {CUSUM_THRESHOLD:g} sigma): "
+              f"{len(alarms)} alarm(s)")
+        for onset, index, direction in alarms[:max_changes]:
+            print(f"{hours[onset]:10.2f}  {'up' if direction > 0 else 'down':4}  "
+                  f"alarm at {hours[index]:.2f} h ({index - onset} samples later)")
+        if len(alarms) > max_changes:
+            print(f"{'':10}  ... {len(alarms) - max_changes} more")
+        print()
+    return results
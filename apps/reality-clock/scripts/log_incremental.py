@@ -0,0 +1,127 @@
+"""
+Incremental analysis of a log that keeps growing.
+
+The running aggregates of every analysis column (RunningStats plus a
+KllSketch for quantiles) are persisted in <log>.agg.json together with how
+many bytes of the log they cover and a fingerprint of those bytes, one set
+per device serial. The next update only folds in the rows appended since
+then, so after a tail sync the report costs time proportional to the new
+data. If the log was rewritten (the fingerprint no longer matches) or was
+analyzed for other columns, that device's aggregates start over; the other
+devices' are kept, so alternating between devices doesn't reset them.
+"""
+
+import json
+import os
+
+from column_cache import _complete_size, _fingerprint
+from log_stats import KllSketch, RunningStats
+from sensor_log import ANALYSIS_COLUMNS, parse_cell
+
+STATE_VERSION = 3
+
+
+def aggregates_path(csv_path):
+    return csv_path + '.agg.json'
+
+
+def _new_state(device, columns):
+    return {
+        'version': STATE_VERSION,
+        'device': device,
+        'columns': list(columns),
+        'parsed_bytes': 0,
+        'fingerprint': None,
+        'rows': 0,
+        'stats': {c: RunningStats() for c in columns},
+        'sketches': {c: KllSketch() for c in columns},
+    }
+
+
+def _load_devices(csv_path):
+    """{device key: serialized aggregates} from <log>.agg.json."""
+    try:
+        with open(aggregates_path(csv_path)) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != STATE_VERSION:
+        return {}
+    return data['devices']
+
+
+def _device_key(device):
+    return device or ''
+
+
+def load_aggregates(csv_path, device=None):
+    """The persisted aggregates of `csv_path` for `device`, or None."""
+    state = _load_devices(csv_path).get(_device_key(device))
+    if state is None:
+        return None
+    state['stats'] = {c: RunningStats.from_dict(d) for c, d in state['stats'].items()}
+    state['sketches'] = {c: KllSketch.from_dict(d) for c, d in state['sketches'].items()}
+    return state
+
+
+def save_aggregates(csv_path, state):
+    """Persist `state` under its device, keeping the other devices' aggregates."""
+    data = dict(state)
+    data['stats'] = {c: s.to_dict() for c, s in state['stats'].items()}
+    data['sketches'] = {c: h.to_dict() for c, h in state['sketches'].items()}
+    devices = _load_devices(csv_path)
+    devices[_device_key(state['device'])] = data
+    path = aggregates_path(csv_path)
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'version': STATE_VERSION, 'devices': devices}, f)
+    os.replace(path + '.tmp', path)
+
+
+def _fold_rows(csv_path, state, start, end):
+    """
+    Add the rows in csv[start:end] to the aggregates; returns how many were
+    read. Rows and cells are skipped as in log_stats.stream_stats().
+    """
+    rows = 0
+    with open(csv_path, 'rb') as f:
+        header = f.readline().decode('utf-8', errors='ignore').strip().split(',')
+        targets = [(c, state['stats'][c], state['sketches'][c], header.index(c))
+                   for c in state['columns'] if c in header]
+        position = max(start, f.tell())
+        f.seek(position)
+        while position < end:
+            line = f.readline()
+            position += len(line)
+            fields = line.decode('utf-8', errors='ignore').rstrip('\r\n').split(',')
+            if len(fields) != len(header):
+                continue
+            rows += 1
+            for column, stats, sketch, index in targets:
+                value = parse_cell(column, fields[index])
+                if value is not None:
+                    stats.add(value)
+                    sketch.add(value)
+    return rows
+
+
+def update_aggregates(csv_path, device=None, columns=ANALYSIS_COLUMNS):
+    """
+    Fold the rows appended to `csv_path` since the last update into its
+    persisted aggregates. Returns (state, new_rows). Only newline-terminated
+    rows are folded; a torn final line waits for the next update.
+    """
+    size = os.path.getsize(csv_path)
+    state = load_aggregates(csv_path, device)
+    if (state is None or state['columns'] != list(columns)
+            or size < state['parsed_bytes']
+            or _fingerprint(csv_path, state['parsed_bytes']) != state['fingerprint']):
+        state = _new_state(device, columns)
+
+    complete = _complete_size(csv_path, size)
+    new_rows = _fold_rows(csv_path, state, state['parsed_bytes'], complete)
+    state['rows'] += new_rows
+    state['parsed_bytes'] = max(complete, state['parsed_bytes'])
+    state['fingerprint'] = _fingerprint(csv_path, state['parsed_bytes'])
+    save_aggregates(csv_path, state)
+    return state, new_rows
+
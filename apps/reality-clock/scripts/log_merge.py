@@ -0,0 +1,118 @@
+"""
+Analyze many sensor logs as one timestamp-ordered stream.
+
+Captures pile up per device and per session (e.g. fleet/<serial>/ from
+--fleet, or renamed copies of sensor_log.csv). merge_logs() streams them
+together with a heap-based k-way merge on (timestamp_ms, session), reading
+one row per file at a time, so nothing is sorted in memory. Each file is
+assumed to be in write order, which debug_log_write() guarantees.
+merged_stats() walks that stream once and keeps RunningStats and a
+KllSketch per session and per column; the pooled statistics are the exact
+merge of the sessions, and the pooled sketches their sketch merge.
+"""
+
+import csv
+import glob
+import heapq
+import os
+
+from log_stats import KllSketch, RunningStats
+from sensor_log import ANALYSIS_COLUMNS, parse_cell
+
+
+def find_logs(pattern):
+    """
+    CSV files matching a glob pattern, or every *.csv below a directory,
+    in sorted order.
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '**', '*.csv')
+    return sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+
+
+def session_names(paths):
+    """Short, unique session tags: each path relative to their common directory."""
+    if not paths:
+        return []
+    if len(paths) == 1:
+        return [os.path.splitext(os.path.basename(paths[0]))[0]]
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+    return [os.path.splitext(os.path.relpath(os.path.abspath(p), root))[0] for p in paths]
+
+
+def _iter_rows(csv_path, session, columns):
+    """
+    Yield (timestamp_ms, session, values) for each complete row of one log
+    with a valid timestamp; an unparseable cell comes through as None.
+    """
+    with open(csv_path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if 'timestamp_ms' not in header:
+            return
+        time_index = header.index('timestamp_ms')
+        indices = [header.index(c) if c in header else None for c in columns]
+        for row in reader:
+            if len(row) != len(header):
+                continue
+            timestamp = parse_cell('timestamp_ms', row[time_index])
+            if timestamp is None:
+                continue
+            yield timestamp, session, tuple(parse_cell(c, row[i]) if i is not None else None
+                                            for c, i in zip(columns, indices))
+
+
+def merge_logs(paths, columns=ANALYSIS_COLUMNS):
+    """
+    Yield (timestamp_ms, session index, values) from all `paths` in order of
+    timestamp_ms, ties broken by session. `values` follows `columns`, with
+    None for a column a file doesn't have.
+    """
+    streams = [_iter_rows(path, index, columns) for index, path in enumerate(paths)]
+    return heapq.merge(*streams, key=lambda row: (row[0], row[1]))
+
+
+def merged_stats(paths, columns=ANALYSIS_COLUMNS):
+    """
+    One pass over the merged stream. Returns (sessions, pooled): a list of
+    {'stats': {column: RunningStats}, 'sketches': {column: KllSketch}} per
+    path plus first/last timestamp_ms, and the same two dicts pooled over
+    all of them.
+    """
+    sessions = [{'stats': {c: RunningStats() for c in columns},
+                 'sketches': {c: KllSketch() for c in columns},
+                 'first_ms': None, 'last_ms': None}
+                for _ in paths]
+    for timestamp, session, values in merge_logs(paths, columns):
+        entry = sessions[session]
+        if entry['first_ms'] is None:
+            entry['first_ms'] = timestamp
+        entry['last_ms'] = timestamp
+        for stats, sketch, value in zip(entry['stats'].values(), entry['sketches'].values(), values):
+            if value is not None:
+                stats.add(value)
+                sketch.add(value)
+
+    pooled = {'stats': {c: RunningStats() for c in columns},
+              'sketches': {c: KllSketch() for c in columns}}
+    for entry in sessions:
+        for c in columns:
+            pooled['stats'][c].merge(entry['stats'][c])
+            pooled['sketches'][c].merge(entry['sketches'][c])
+    return sessions, pooled
+
+
+def print_session_summary(names, sessions):
+    """Print one line of key statistics per session."""
+    print(f"{'SESSION':28} {'SAMPLES':>8} {'315':>8} {'433':>8} {'868':>8} {'PHI':>9} {'PHI SD':>9}")
+    print("-" * 84)
+    for name, entry in zip(names, sessions):
+        stats = entry['stats']
+        count = max((s.count for s in stats.values()), default=0)
+        means = [f"{stats[c].mean:8.2f}" if c in stats and stats[c].count else f"{'-':>8}"
+                 for c in ('rssi_315', 'rssi_433', 'rssi_868')]
+        phi = stats.get('phi_current')
+        phi_text = (f"{phi.mean:9.6f} {phi.std:9.6f}" if phi is not None and phi.count
+                    else f"{'-':>9} {'-':>9}")
+        print(f"{name[-28:]:28} {count:8d} {' '.join(means)} {phi_text}")
+    print()
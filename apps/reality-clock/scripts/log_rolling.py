@@ -0,0 +1,174 @@
+"""
+Windowed statistics that mirror the firmware's RollingBuffer.
+
+The app averages each band over the last BUFFER_SIZE samples (fewer while
+the buffer fills) and computes phi_current from those averages. The
+functions here give the same windowed mean, standard deviation, min and
+max for every sample of a logged column, for any window length, in O(n)
+total: means and deviations come from cumulative sums, and min/max from
+the van Herk/Gil-Werman block scan with NumPy, or monotonic deques
+without it.
+"""
+
+import math
+from collections import deque
+
+from sensor_log import np
+
+BUFFER_SIZE = 1000  # reality_clock.c
+RSSI_OFFSET = 120.0  # db_to_linear_normalized()
+
+
+def rolling_mean_std(values, window=BUFFER_SIZE):
+    """
+    Windowed mean and sample standard deviation ending at every sample.
+    Windows shorter than `window` at the start cover all samples so far,
+    like buffer_average(); the std of a single sample is 0.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    if n == 0:
+        return np.empty(0), np.empty(0)
+    # Centre first so the running sum of squares doesn't cancel badly.
+    shift = x.mean()
+    centred = x - shift
+    s1 = np.concatenate(([0.0], np.cumsum(centred)))
+    s2 = np.concatenate(([0.0], np.cumsum(centred * centred)))
+    end = np.arange(1, n + 1)
+    start = np.maximum(end - window, 0)
+    count = end - start
+    total = s1[end] - s1[start]
+    mean = total / count
+    m2 = np.maximum(s2[end] - s2[start] - total * mean, 0.0)
+    std = np.sqrt(np.divide(m2, count - 1, out=np.zeros(n), where=count > 1))
+    return mean + shift, std
+
+
+def _block_scan(x, window, extreme, fill):
+    """
+    van Herk/Gil-Werman: extreme (np.minimum or np.maximum) over every full
+    window of x in O(n), whatever the window length.
+    """
+    n = len(x)
+    blocks = -(-n // window)
+    padded = np.full(blocks * window, fill)
+    padded[:n] = x
+    padded = padded.reshape(blocks, window)
+    prefix = extreme.accumulate(padded, axis=1).ravel()
+    suffix = extreme.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    # The window ending at i starts at j = i - window + 1: the suffix of j's
+    # block and the prefix of i's block cover it exactly.
+    i = np.arange(window - 1, n)
+    return extreme(suffix[i - window + 1], prefix[i])
+
+
+def rolling_min_max(values, window=BUFFER_SIZE):
+    """Windowed minimum and maximum ending at every sample (growing at first)."""
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    if n == 0:
+        return np.empty(0), np.empty(0)
+    window = max(1, min(window, n))
+    head = slice(0, window - 1)
+    lo = np.empty(n)
+    hi = np.empty(n)
+    lo[head] = np.minimum.accumulate(x[head])
+    hi[head] = np.maximum.accumulate(x[head])
+    lo[window - 1:] = _block_scan(x, window, np.minimum, np.inf)
+    hi[window - 1:] = _block_scan(x, window, np.maximum, -np.inf)
+    return lo, hi
+
+
+def rolling_stats_python(values, window=BUFFER_SIZE):
+    """
+    Pure-Python equivalent of rolling_stats(): running sums for mean/std and
+    monotonic deques of indices for min/max. Returns lists.
+    """
+    values = list(values)
+    means, stds, mins, maxs = [], [], [], []
+    lows, highs = deque(), deque()
+    total = total_sq = 0.0
+    shift = values[0] if values else 0.0
+    for i, value in enumerate(values):
+        d = value - shift
+        total += d
+        total_sq += d * d
+        if i >= window:
+            old = values[i - window] - shift
+            total -= old
+            total_sq -= old * old
+        count = min(i + 1, window)
+        mean = total / count
+        means.append(mean + shift)
+        stds.append(math.sqrt(max(total_sq - total * mean, 0.0) / (count - 1)) if count > 1 else 0.0)
+
+        while lows and values[lows[-1]] >= value:
+            lows.pop()
+        lows.append(i)
+        while highs and values[highs[-1]] <= value:
+            highs.pop()
+        highs.append(i)
+        if lows[0] <= i - window:
+            lows.popleft()
+        if highs[0] <= i - window:
+            highs.popleft()
+        mins.append(values[lows[0]])
+        maxs.append(values[highs[0]])
+    return {'mean': means, 'std': stds, 'min': mins, 'max': maxs}
+
+
+def rolling_stats(values, window=BUFFER_SIZE):
+    """Windowed mean/std/min/max arrays ending at every sample of one column."""
+    if np is None:
+        return rolling_stats_python(values, window)
+    mean, std = rolling_mean_std(values, window)
+    lo, hi = rolling_min_max(values, window)
+    return {'mean': mean, 'std': std, 'min': lo, 'max': hi}
+
+
+def replay_phi(rssi_315, rssi_433, rssi_868, window=BUFFER_SIZE):
+    """
+    phi_current as calculate_phi() computes it on the device: from the
+    windowed averages of the three bands, normalized like
+    db_to_linear_normalized().
+    """
+    lin = []
+    for band in (rssi_315, rssi_433, rssi_868):
+        normalized = rolling_mean_std(band, window)[0] + RSSI_OFFSET
+        normalized[normalized < 0] = 0.1
+        lin.append(10.0 ** (normalized / 20.0))
+    lf, hf, uhf = lin
+    return np.where(hf < 0.001, 0.0, lf * uhf / np.maximum(hf * hf, 1e-12))
+
+
+def print_rolling_report(data, window=BUFFER_SIZE):
+    """
+    Summarize how the windowed statistics moved over the capture, and how
+    closely phi recomputed from the windowed band averages tracks the
+    logged phi_current.
+    """
+    print(f"ROLLING WINDOW ({window} samples):")
+    print("-" * 50)
+    print(f"{'':14} {'MEAN FROM':>10} {'MEAN TO':>10} {'AVG STD':>9} {'MAX SPAN':>9}")
+    for column, values in data.items():
+        if len(values) == 0:
+            continue
+        r = rolling_stats(values, window)
+        if np is not None:
+            low, high = r['mean'].min(), r['mean'].max()
+            spread = r['std'].mean()
+            span = (r['max'] - r['min']).max()
+        else:
+            low, high = min(r['mean']), max(r['mean'])
+            spread = sum(r['std']) / len(r['std'])
+            span = max(h - l for l, h in zip(r['min'], r['max']))
+        print(f"{column:14} {low:10.4f} {high:10.4f} {spread:9.4f} {span:9.4f}")
+
+    bands = [data.get(c) for c in ('rssi_315', 'rssi_433', 'rssi_868', 'phi_current')]
+    if (np is not None and all(b is not None and len(b) for b in bands)
+            and len({len(b) for b in bands}) == 1):
+        phi = replay_phi(bands[0], bands[1], bands[2], window)
+        error = phi - np.asarray(bands[3], dtype=np.float64)
+        print(f"\nphi_current replayed from windowed band averages: "
+              f"RMS error {np.sqrt(np.mean(error ** 2)):.6f}, max {np.abs(error).max():.6f}")
+    print()
@@ -0,0 +1,223 @@
+"""
+Frequency-domain view of the logged RSSI bands.
+
+Periodic interference (duty-cycled 433 MHz sensors, a neighbour's weather
+station, switching supplies) shows up as peaks in the power spectrum of a
+band. The log is sampled at irregular moments (200 ms while calibrating,
+SAMPLE_INTERVAL_NORMAL_MS after, plus scheduling jitter), so each band is
+first interpolated onto a uniform grid at the typical sample interval.
+
+welch_psd() averages Hann-windowed, half-overlapping segments; the segments
+are strided views of the resampled series, transformed SEGMENT_BATCH at a
+time with one rfft call. spectrogram() keeps the per-segment power instead,
+which shows whether a periodicity comes and goes. Needs NumPy.
+"""
+
+import math
+
+from log_allan import SAMPLE_INTERVAL_NORMAL_MS, sample_interval
+from sensor_log import have_numpy, np
+
+SPECTRUM_COLUMNS = ('rssi_315', 'rssi_433', 'rssi_868')
+WELCH_SEGMENT = 1024  # samples per segment; resolves periods up to ~17 min at 1 Hz
+SEGMENT_BATCH = 1024  # segments per rfft call
+PEAK_SNR_DB = 10.0  # how far above the local noise floor a peak has to be
+PEAK_FLOOR_BINS = 16  # bins either side used for the local noise floor
+SPECTROGRAM_SLICES = 8
+SLICE_SEGMENTS = 8  # fewest segments averaged per slice, to keep noise peaks out
+MIN_SAMPLES_PER_PERIOD = 2.5  # Nyquist needs 2; leave some margin
+
+
+def _require_numpy():
+    if not have_numpy():
+        raise RuntimeError("numpy is not installed (pip install numpy)")
+
+
+def _as_float(values):
+    """float64 copy of a column with NaN for masked cells."""
+    if isinstance(values, np.ma.MaskedArray):
+        return values.astype(np.float64).filled(np.nan)
+    return np.asarray(values, dtype=np.float64)
+
+
+def resample_uniform(timestamps, values, interval_ms):
+    """
+    Linearly interpolate `values` logged at `timestamps` (ms) onto a grid
+    every `interval_ms` from the first to the last timestamp. Cells that
+    are masked or NaN are skipped, as are timestamps that don't move
+    forward (a restarted app starts counting from 0 again). Returns
+    (grid, resampled); both are empty with fewer than two usable samples.
+    """
+    _require_numpy()
+    t = _as_float(timestamps)
+    v = _as_float(values)
+    ok = np.isfinite(t) & np.isfinite(v)
+    t, v = t[ok], v[ok]
+    if len(t) > 1:
+        forward = np.concatenate(([True], t[1:] > np.maximum.accumulate(t)[:-1]))
+        t, v = t[forward], v[forward]
+    if len(t) < 2:
+        return np.empty(0), np.empty(0)
+    grid = np.arange(t[0], t[-1] + interval_ms / 2, interval_ms)
+    return grid, np.interp(grid, t, v)
+
+
+def _segment_length(n, segment):
+    """`segment`, or the largest power of two that fits twice into n."""
+    while segment > 16 and 2 * segment > n:
+        segment //= 2
+    return segment if 2 * segment <= n else None
+
+
+def _segment_power(x, segment, batch=SEGMENT_BATCH):
+    """
+    Yield the periodogram of every Hann-windowed, mean-removed segment of x
+    (half-overlapping), as 2D arrays of up to `batch` segments.
+    """
+    window = np.hanning(segment)
+    frames = np.lib.stride_tricks.sliding_window_view(x, segment)[::segment // 2]
+    for start in range(0, len(frames), batch):
+        block = frames[start:start + batch]
+        block = (block - block.mean(axis=1, keepdims=True)) * window
+        yield np.abs(np.fft.rfft(block, axis=1)) ** 2
+
+
+def _density_scale(segment, fs):
+    """One-sided power spectral density scaling of a Hann periodogram."""
+    window = np.hanning(segment)
+    scale = np.full(segment // 2 + 1, 2.0 / (fs * (window @ window)))
+    scale[0] /= 2
+    if segment % 2 == 0:
+        scale[-1] /= 2
+    return scale
+
+
+def welch_psd(x, fs, segment=WELCH_SEGMENT):
+    """
+    Welch power spectral density of a uniformly sampled series at `fs` Hz.
+    Returns (freqs, psd), or None if x is too short for a 16-sample segment.
+    """
+    _require_numpy()
+    x = np.asarray(x, dtype=np.float64)
+    segment = _segment_length(len(x), segment)
+    if segment is None:
+        return None
+    total = np.zeros(segment // 2 + 1)
+    frames = 0
+    for power in _segment_power(x, segment):
+        total += power.sum(axis=0)
+        frames += len(power)
+    return np.fft.rfftfreq(segment, 1.0 / fs), total / frames * _density_scale(segment, fs)
+
+
+def spectrogram(x, fs, segment=WELCH_SEGMENT):
+    """
+    Power spectral density of each half-overlapping segment. Returns
+    (times, freqs, power) with times at the segment centres in seconds and
+    power shaped (segments, frequencies), or None if x is too short.
+    """
+    _require_numpy()
+    x = np.asarray(x, dtype=np.float64)
+    segment = _segment_length(len(x), segment)
+    if segment is None:
+        return None
+    power = np.concatenate(list(_segment_power(x, segment))) * _density_scale(segment, fs)
+    times = (np.arange(len(power)) * (segment // 2) + segment / 2) / fs
+    return times, np.fft.rfftfreq(segment, 1.0 / fs), power
+
+
+def dominant_periods(freqs, psd, count=3, snr_db=PEAK_SNR_DB):
+    """
+    Up to `count` spectral peaks at least `snr_db` above the median of the
+    surrounding bins, strongest first, as (period s, frequency Hz, dB above
+    floor), interpolated between bins. The lowest bin is skipped: a period
+    as long as the segment is drift, not periodicity.
+    """
+    inner = psd[2:-1]
+    peaks = np.nonzero((inner > psd[1:-2]) & (inner >= psd[3:]))[0] + 2
+    found = []
+    for i in peaks:
+        neighbours = np.concatenate((psd[max(1, i - PEAK_FLOOR_BINS):i - 1],
+                                     psd[i + 2:i + PEAK_FLOOR_BINS + 1]))
+        floor = np.median(neighbours) if len(neighbours) else 0.0
+        if floor <= 0:
+            continue
+        snr = 10 * math.log10(psd[i] / floor)
+        if snr >= snr_db:
+            # Parabola through the log power of the peak bin and its
+            # neighbours, for a frequency finer than the bin spacing.
+            a, b, c = np.log(psd[i - 1:i + 2])
+            offset = 0.5 * (a - c) / (a - 2 * b + c) if a - 2 * b + c < 0 else 0.0
+            freq = float(freqs[i] + offset * (freqs[1] - freqs[0]))
+            found.append((1.0 / freq, freq, snr))
+    found.sort(key=lambda peak: -peak[2])
+    return found[:count]
+
+
+def print_spectrum_report(data, timestamps, segment=WELCH_SEGMENT):
+    """
+    Print the dominant periodicities of each band, how the strongest one
+    moves over the capture, and the SAMPLE_INTERVAL_NORMAL_MS that keeps
+    every detected period sampled above Nyquist. `data` maps columns to
+    values row-aligned with `timestamps` (ms).
+    """
+    if not have_numpy():
+        print("Spectral analysis needs numpy (pip install numpy)\n")
+        return None
+    interval = sample_interval(timestamps)
+    fs = 1.0 / interval
+
+    results = {}
+    for column in SPECTRUM_COLUMNS:
+        if column not in data or len(data[column]) == 0:
+            continue
+        _, x = resample_uniform(timestamps, data[column], interval * 1000)
+        welch = welch_psd(x, fs, segment)
+        if welch is not None:
+            results[column] = (x, dominant_periods(*welch))
+    if not results:
+        return None
+
+    used = _segment_length(max(len(x) for x, _ in results.values()), segment)
+    print(f"SPECTRUM (Welch, {used}-sample Hann segments, resampled to {interval:g} s):")
+    print("-" * 50)
+    for column, (_, peaks) in results.items():
+        if not peaks:
+            print(f"{column:14} no periodic components above the noise floor")
+        for i, (period, freq, snr) in enumerate(peaks):
+            label = column if i == 0 else ''
+            print(f"{label:14} period {period:10.1f} s  ({freq:.5f} Hz)  +{snr:.1f} dB")
+
+    slices = {}
+    for column, (x, _) in results.items():
+        times, freqs, power = spectrogram(x, fs, segment)
+        count = min(SPECTROGRAM_SLICES, len(power) // SLICE_SEGMENTS)
+        bounds = np.linspace(0, len(power), count + 1).astype(int)
+        slices[column] = [(times[a], dominant_periods(freqs, power[a:b].mean(axis=0), count=1))
+                          for a, b in zip(bounds[:-1], bounds[1:])]
+    rows = max(len(s) for s in slices.values())
+    if rows > 1:
+        print("\nStrongest period per slice of the capture (s):")
+        print(f"{'AT (h)':>10}" + ''.join(f"{c:>16}" for c in results))
+        for row in range(rows):
+            start = min(s[row][0] for s in slices.values() if row < len(s))
+            cells = ''
+            for s in slices.values():
+                peaks = s[row][1] if row < len(s) else []
+                cells += f"{peaks[0][0]:11.1f} {peaks[0][2]:+3.0f}dB" if peaks else f"{'-':>16}"
+            print(f"{start / 3600:10.2f}{cells}")
+
+    periods = [p for _, peaks in results.values() for p, _, _ in peaks]
+    print("\n/* Sample interval that doesn't alias the detected periodicities */")
+    if not periods:
+        print(f"#define SAMPLE_INTERVAL_NORMAL_MS {SAMPLE_INTERVAL_NORMAL_MS}  /* no periodicities found; keep it */")
+    else:
+        shortest = min(periods)
+        if shortest < MIN_SAMPLES_PER_PERIOD * interval:
+            print(f"/* The {shortest:.1f} s peak is close to the Nyquist limit; it may be a faster")
+            print("   source aliased down. Log at the calibration rate to pin it down. */")
+        limit = int(shortest * 1000 / MIN_SAMPLES_PER_PERIOD) // 100 * 100
+        print(f"#define SAMPLE_INTERVAL_NORMAL_MS {max(limit, 100)}  "
+              f"/* at most; {MIN_SAMPLES_PER_PERIOD:g} samples per {shortest:.1f} s period */")
+    print()
+    return {column: peaks for column, (_, peaks) in results.items()}
@@ -0,0 +1,262 @@
+"""
+Single-pass, constant-memory statistics over the sensor log.
+
+RunningStats keeps count, mean, M2 (Welford's update), min and max for one
+column; two of them merge exactly with Chan's formula, so partial results
+from different files or workers can be combined without the raw data.
+KllSketch estimates quantiles in bounded memory and merges the same way.
+Both serialize to plain dicts so they can be persisted between runs.
+"""
+
+import csv
+import math
+
+from sensor_log import ANALYSIS_COLUMNS, parse_cell
+
+KLL_K = 200  # size of the top compactor; rank error is about 1.7 / KLL_K
+KLL_DECAY = 2 / 3  # each lower level holds this fraction of the one above
+
+
+class RunningStats:
+    """Numerically stable running moments plus min/max of one column."""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, min=math.inf, max=-math.inf):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.min = min
+        self.max = max
+
+    @classmethod
+    def from_values(cls, values):
+        """Moments of a whole NumPy array, computed vectorized."""
+        if len(values) == 0:
+            return cls()
+        values = values.astype('float64', copy=False)
+        mean = float(values.mean())
+        deviations = values - mean
+        return cls(len(values), mean, float(deviations @ deviations),
+                   float(values.min()), float(values.max()))
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def merge(self, other):
+        """Fold another RunningStats into this one (Chan et al.)."""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.count > 1 else 0
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2,
+                'min': self.min if self.count else None, 'max': self.max if self.count else None}
+
+    @classmethod
+    def from_dict(cls, d):
+        if not d['count']:
+            return cls()
+        return cls(d['count'], d['mean'], d['m2'], d['min'], d['max'])
+
+    def summary(self):
+        """The same dict sensor_log.summarize() returns, or None if empty."""
+        if self.count == 0:
+            return None
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'std': self.std,
+            'min': self.min,
+            'max': self.max,
+        }
+
+
+class KllSketch:
+    """
+    KLL quantile sketch: a stack of compactors, where level h holds items
+    that each stand for 2**h samples. When the sketch is full, its lowest
+    full level is sorted and every other item moves up a level, so memory
+    stays around 3k items whatever the sample count, with a rank error of
+    roughly 1.7/k. Two sketches merge by pooling their levels, so
+    per-session or per-device sketches combine without the raw data.
+    Compaction offsets alternate rather than being random, which keeps
+    results reproducible.
+    """
+
+    __slots__ = ('k', 'n', 'min', 'max', 'levels', 'coin', 'size', 'limit')
+
+    def __init__(self, k=KLL_K, n=0, min=math.inf, max=-math.inf, levels=None, coin=0):
+        self.k = k
+        self.n = n
+        self.min = min
+        self.max = max
+        self.levels = levels if levels is not None else [[]]
+        self.coin = coin
+        self.size = sum(len(items) for items in self.levels)
+        self.limit = self._max_size()
+
+    @classmethod
+    def from_values(cls, values, k=KLL_K):
+        sketch = cls(k)
+        sketch.add_many(values)
+        return sketch
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, math.ceil(self.k * KLL_DECAY ** depth))
+
+    def _max_size(self):
+        return sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def _compress(self):
+        """
+        Compact the lowest full level, then the next, until the sketch fits
+        in its total capacity again; levels that aren't full are left alone.
+        """
+        while self.size >= self.limit:
+            for level in range(len(self.levels)):
+                if len(self.levels[level]) >= self._capacity(level):
+                    if level + 1 == len(self.levels):
+                        self.levels.append([])
+                        self.limit = self._max_size()
+                    items = sorted(self.levels[level])
+                    keep = [items.pop()] if len(items) % 2 else []
+                    promoted = items[self.coin::2]
+                    self.levels[level + 1].extend(promoted)
+                    self.levels[level] = keep
+                    self.coin ^= 1
+                    self.size -= len(items) - len(promoted)
+                    if self.size < self.limit:
+                        break
+
+    def add(self, x):
+        self.levels[0].append(x)
+        self.n += 1
+        self.size += 1
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        if self.size >= self.limit:
+            self._compress()
+
+    def add_many(self, values):
+        """Add a batch of values (a sequence or NumPy array) at once."""
+        values = values.tolist() if hasattr(values, 'tolist') else list(values)
+        if not values:
+            return
+        self.levels[0].extend(values)
+        self.n += len(values)
+        self.size += len(values)
+        self.min = min(self.min, min(values))
+        self.max = max(self.max, max(values))
+        self._compress()
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        self.limit = self._max_size()
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.n += other.n
+        self.size += other.size
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    @property
+    def count(self):
+        return self.n
+
+    def quantiles(self, qs):
+        """Approximate value at each quantile in `qs`, or None if empty."""
+        if self.n == 0:
+            return [None] * len(qs)
+        items = sorted((x, 1 << level) for level, xs in enumerate(self.levels) for x in xs)
+        total = sum(weight for _, weight in items)
+        results = []
+        for q in qs:
+            if q <= 0:
+                results.append(self.min)
+                continue
+            if q >= 1:
+                results.append(self.max)
+                continue
+            target = q * total
+            seen = 0
+            for x, weight in items:
+                seen += weight
+                if seen >= target:
+                    results.append(x)
+                    break
+        return results
+
+    def to_dict(self):
+        return {'k': self.k, 'n': self.n, 'min': self.min if self.n else None,
+                'max': self.max if self.n else None, 'levels': self.levels, 'coin': self.coin}
+
+    @classmethod
+    def from_dict(cls, d):
+        if not d['n']:
+            return cls(d['k'])
+        return cls(d['k'], d['n'], d['min'], d['max'], d['levels'], d['coin'])
+
+
+def stream_stats(csv_path, columns=ANALYSIS_COLUMNS, sketches=None):
+    """
+    Compute RunningStats for each column in one pass over the file, holding
+    only the current row in memory. Like the masked engine, rows with the
+    wrong number of fields (a torn write) are skipped and an unparseable
+    cell is left out of its own column only. If `sketches` is a dict, it
+    also gets a KllSketch of each column.
+    """
+    stats = {key: RunningStats() for key in columns}
+    if sketches is not None:
+        sketches.update({key: KllSketch() for key in columns})
+    with open(csv_path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        targets = [(key, stats[key], sketches[key] if sketches is not None else None,
+                    header.index(key))
+                   for key in columns if key in header]
+        for row in reader:
+            if len(row) != len(header):
+                continue
+            for key, column, sketch, index in targets:
+                value = parse_cell(key, row[index])
+                if value is None:
+                    continue
+                column.add(value)
+                if sketch is not None:
+                    sketch.add(value)
+    return stats
@@ -0,0 +1,344 @@
+"""
+Resumable and incremental transfers of the sensor log from the Flipper.
+
+The CLI has no ranged read, so `storage read_chunks` is used: the device
+sends the file in fixed-size chunks and waits for a keypress before each
+one. Every chunk is CRC-checked and recorded in a JSON state file next to
+the partial download, so an interrupted or corrupted transfer only rewrites
+ranges that later passes disagree on, and the result is verified end to end
+against `storage md5`.
+
+sync_log_tail() keeps a local copy current across repeated pulls: it
+remembers the remote size and a hash of the last block it saw, and only
+appends what the app has written since.
+
+Both take a serial port that is already at the CLI prompt, such as
+FlipperCliSession.ser.
+"""
+
+import hashlib
+import json
+import os
+import zlib
+
+from flipper_cli import (
+    LOG_REMOTE_PATH,
+    FlipperCliError,
+    drain_to_prompt,
+    read_size_header,
+    remote_md5,
+    read_exact,
+    remote_size,
+    remote_timestamp,
+)
+
+DEFAULT_CHUNK_SIZE = 16 * 1024  # read_chunks mallocs this much on the Flipper
+STATE_VERSION = 2
+TAIL_BLOCK_SIZE = 4096
+SYNC_STATE_VERSION = 2
+
+
+def _load_state(state_path):
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get('version') != STATE_VERSION:
+        return None
+    return state
+
+
+def _save_state(state_path, state):
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+
+def _file_md5(path):
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_chunk(ser, size):
+    """Acknowledge the device's `Ready?` and read one chunk of `size` bytes."""
+    marker = ser.read_until(b'Ready?\r\n')
+    if not marker.endswith(b'Ready?\r\n'):
+        raise FlipperCliError("Timed out waiting for the next chunk")
+    ser.write(b'\n')
+    ser.flush()
+    data = bytearray()
+    while len(data) < size:
+        block = ser.read(size - len(data))
+        if not block:
+            break
+        data += block
+    return bytes(data)
+
+
+def _transfer_pass(ser, remote_path, part_path, state, state_path, prefer_fresh=False):
+    """
+    Stream the whole file once and reconcile it with the partial download.
+
+    Each chunk in the state file carries its CRC and the number of passes
+    that agreed on it. A chunk that arrives with a different CRC only
+    replaces the stored one once that version has been seen more often, so
+    a corrupted pass can't overwrite a range that was already good. With
+    prefer_fresh=True (the file failed its MD5 check) a tie goes to the
+    chunk just read. Returns the number of chunks written.
+    """
+    chunk_size = state['chunk_size']
+    ser.write(f"storage read_chunks {remote_path} {chunk_size}\r\n".encode())
+    ser.flush()
+    size = read_size_header(ser)
+    if size != state['size']:
+        raise FlipperCliError(f"Remote size changed to {size} during transfer")
+
+    chunks = state['chunks']
+    alternates = state['alternates']
+    written = 0
+    with open(part_path, 'r+b') as f:
+        offset = 0
+        index = 0
+        while offset < size:
+            expected = min(chunk_size, size - offset)
+            data = _read_chunk(ser, expected)
+            if len(data) != expected:
+                raise FlipperCliError(f"Transfer stopped at offset {offset + len(data)} of {size}")
+            crc = zlib.crc32(data)
+            write = False
+            if index >= len(chunks):
+                chunks.append([crc, 1])
+                write = True
+            elif chunks[index][0] == crc:
+                chunks[index][1] += 1
+            else:
+                seen = alternates.setdefault(str(index), {})
+                votes = seen.pop(str(crc), 0) + 1
+                if votes > chunks[index][1] or (prefer_fresh and votes == chunks[index][1]):
+                    old_crc, old_votes = chunks[index]
+                    seen[str(old_crc)] = old_votes
+                    chunks[index] = [crc, votes]
+                    write = True
+                else:
+                    seen[str(crc)] = votes
+            if write:
+                f.seek(offset)
+                f.write(data)
+                f.flush()
+                written += 1
+            if write or index % 64 == 0:
+                _save_state(state_path, state)
+            offset += expected
+            index += 1
+        f.truncate(size)
+    _save_state(state_path, state)
+    drain_to_prompt(ser)
+    return written
+
+
+def download_log_chunked(ser, output_path, remote_path=LOG_REMOTE_PATH,
+                         chunk_size=DEFAULT_CHUNK_SIZE, max_passes=5):
+    """
+    Download `remote_path` into `output_path`, resuming from an earlier
+    interrupted run if its state file is still around. Returns True once the
+    local copy matches the device's MD5.
+    """
+    part_path = output_path + '.part'
+    state_path = output_path + '.state.json'
+
+    md5 = remote_md5(ser, remote_path)
+
+    state = _load_state(state_path)
+    if (state is None or not os.path.exists(part_path)
+            or state['remote_path'] != remote_path
+            or state['chunk_size'] != chunk_size):
+        state = {
+            'version': STATE_VERSION,
+            'remote_path': remote_path,
+            'chunk_size': chunk_size,
+            'chunks': [],
+            'alternates': {},
+        }
+        open(part_path, 'wb').close()
+    elif state.get('md5') != md5:
+        print("Remote log changed since the last attempt; re-verifying all chunks")
+        # Votes from an older version of the file say nothing about this one,
+        # and a partial last chunk can't match now that the file has grown.
+        for chunk in state['chunks']:
+            chunk[1] = 1
+        state['alternates'] = {}
+        del state['chunks'][state['size'] // chunk_size:]
+
+    state['md5'] = md5
+    state['size'] = remote_size(ser, remote_path)
+    del state['chunks'][-(-state['size'] // chunk_size):]
+    _save_state(state_path, state)
+
+    for attempt in range(1, max_passes + 1):
+        written = _transfer_pass(ser, remote_path, part_path, state, state_path,
+                                 prefer_fresh=attempt > 1)
+        if _file_md5(part_path) == md5:
+            os.replace(part_path, output_path)
+            os.remove(state_path)
+            print(f"Downloaded {state['size']} bytes to {output_path} "
+                  f"({written} chunks written on the final pass)")
+            return True
+        print(f"MD5 mismatch after pass {attempt}; re-fetching chunks that differ")
+
+    print(f"Giving up after {max_passes} passes; progress kept in {state_path}")
+    return False
+
+
+def _tail_hash(path, size, block_size=TAIL_BLOCK_SIZE):
+    """SHA-256 of the last block ending at `size`, plus the block length."""
+    length = min(block_size, size)
+    with open(path, 'rb') as f:
+        f.seek(size - length)
+        return hashlib.sha256(f.read(length)).hexdigest(), length
+
+
+class _PrefixSink:
+    """
+    Writable that checks what it's given against the start of the local copy.
+
+    Matching bytes are dropped. At the first byte that differs, the part of
+    the local copy that did match is copied into `spool_path` and everything
+    received from then on is written there too, so a rewritten log never has
+    to cross the wire twice.
+    """
+
+    def __init__(self, local_path, spool_path):
+        self.local = open(local_path, 'rb')
+        self.spool_path = spool_path
+        self.spool = None
+        self.matched = 0
+
+    def write(self, data):
+        if self.spool is None:
+            if self.local.read(len(data)) == data:
+                self.matched += len(data)
+                return len(data)
+            self.spool = open(self.spool_path, 'wb')
+            self.local.seek(0)
+            remaining = self.matched
+            while remaining:
+                block = self.local.read(min(remaining, 1024 * 1024))
+                self.spool.write(block)
+                remaining -= len(block)
+        self.spool.write(data)
+        return len(data)
+
+    def close(self):
+        self.local.close()
+        if self.spool is not None:
+            self.spool.close()
+
+
+def _sync_state_matches(state, device_id, remote_path, local_path):
+    """True if `state` describes this device's log and the local copy is intact."""
+    if (state is None or state.get('version') != SYNC_STATE_VERSION
+            or state.get('device') != device_id
+            or state.get('remote_path') != remote_path):
+        return False
+    try:
+        if os.path.getsize(local_path) != state['size']:
+            return False
+        return _tail_hash(local_path, state['size'])[0] == state['tail_hash']
+    except OSError:
+        return False
+
+
+def sync_log_tail(ser, local_path, device_id, remote_path=LOG_REMOTE_PATH):
+    """
+    Bring `local_path` up to date with the log on the device.
+
+    If the remote file only grew since the last sync, the new bytes are
+    appended to the local copy. If it shrank, or its start no longer matches
+    the local copy (the app truncates the log when it starts), the local copy
+    is replaced with what was just read, in the same single pass. Returns the
+    number of bytes added to or written into the local copy, or None on
+    failure.
+    """
+    state_path = local_path + '.sync.json'
+    spool_path = local_path + '.sync.part'
+
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = None
+    if not _sync_state_matches(state, device_id, remote_path, local_path):
+        state = None
+
+    size = remote_size(ser, remote_path)
+    timestamp = remote_timestamp(ser, remote_path)
+
+    if (state is not None and size == state['size']
+            and timestamp is not None and timestamp == state.get('timestamp')):
+        print(f"{local_path} is up to date ({size} bytes)")
+        return 0
+
+    # Bytes before `known` are already on disk; the last block before it is
+    # compared against the stored hash to rule out a truncate-and-regrow.
+    known = state['size'] if state is not None and size >= state['size'] else 0
+
+    ser.write(f"storage read {remote_path}\r\n".encode())
+    ser.flush()
+    size = read_size_header(ser)
+    if size < known:
+        known = 0
+
+    # The prefix has to cross the wire, but it's only compared against the
+    # local copy unless it turns out to differ (the log was truncated and
+    # grew back past the old size), in which case it goes to the spool.
+    sink = _PrefixSink(local_path, spool_path) if known else None
+    try:
+        copied = read_exact(ser, known, sink) if known else 0
+        if copied != known:
+            raise FlipperCliError(f"Transfer stopped at {copied} of {size} bytes")
+    finally:
+        if sink is not None:
+            sink.close()
+    appended = known > 0 and sink.spool is None
+
+    if appended:
+        with open(local_path, 'ab') as target:
+            copied = read_exact(ser, size - known, target)
+        drain_to_prompt(ser)
+        if copied != size - known:
+            # Drop the partial tail so the next sync starts from a clean copy.
+            with open(local_path, 'r+b') as f:
+                f.truncate(known)
+            raise FlipperCliError(f"Transfer stopped at {known + copied} of {size} bytes")
+    else:
+        if known:
+            print("Remote log was rewritten since the last sync; keeping the new copy")
+        with open(spool_path, 'ab' if known else 'wb') as target:
+            copied = known + read_exact(ser, size - known, target)
+        drain_to_prompt(ser)
+        if copied != size:
+            os.remove(spool_path)
+            raise FlipperCliError(f"Transfer stopped at {copied} of {size} bytes")
+        os.replace(spool_path, local_path)
+
+    tail_hash, tail_len = _tail_hash(local_path, size)
+    _save_state(state_path, {
+        'version': SYNC_STATE_VERSION,
+        'device': device_id,
+        'remote_path': remote_path,
+        'size': size,
+        'timestamp': timestamp,
+        'tail_hash': tail_hash,
+        'tail_len': tail_len,
+    })
+
+    if appended:
+        print(f"Appended {size - known} new bytes to {local_path} ({size} bytes total)")
+        return size - known
+    print(f"Downloaded {size} bytes to {local_path}")
+    return size
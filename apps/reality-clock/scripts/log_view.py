@@ -0,0 +1,80 @@
+"""
+Column-projected, lazily loaded access to the sensor log.
+
+    from log_view import open_log
+
+    log = open_log('sensor_log.csv', ['phi_current'])
+    phi = log['phi_current']
+
+open_log() only records which columns are wanted; nothing is read until a
+column is first accessed. Columns outside the projection are never parsed
+or held in memory, even by the column cache: the first access adds any
+projected column the cache doesn't hold yet, and each column is then
+memory-mapped on its own first access. Without the cache the whole
+projection is parsed together on first access, so the columns stay
+row-aligned when bad rows are dropped.
+"""
+
+from collections.abc import Mapping
+
+from column_cache import map_columns, update_cache
+from sensor_log import ANALYSIS_COLUMNS, have_numpy, load_columns
+
+
+class LogView(Mapping):
+    """Read-only mapping of column name to array, loaded on first access."""
+
+    def __init__(self, csv_path, columns=ANALYSIS_COLUMNS, engine='auto', cache=True):
+        self.csv_path = csv_path
+        self.columns = tuple(columns)
+        self.engine = engine
+        self.cache = cache and engine == 'auto' and have_numpy()
+        self._loaded = {}
+        self._meta = None  # cache state pinned at first access
+
+    def __getitem__(self, column):
+        if column not in self.columns:
+            raise KeyError(f"{column} is not in the projection {self.columns}")
+        if column not in self._loaded:
+            self._load(column)
+        return self._loaded[column]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+    def __repr__(self):
+        return f"LogView({self.csv_path!r}, columns={self.columns}, loaded={tuple(self._loaded)})"
+
+    @property
+    def rows(self):
+        """Number of samples, read from the first column of the projection."""
+        return len(self[self.columns[0]]) if self.columns else 0
+
+    def _load(self, column):
+        if self.cache:
+            try:
+                if self._meta is None:
+                    self._meta = update_cache(self.csv_path, self.columns)
+                self._loaded.update(map_columns(self.csv_path, self._meta, [column]))
+                return
+            except OSError as e:
+                print(f"Column cache unavailable ({e}); parsing the CSV")
+                self.cache = False
+        self._loaded.update(load_columns(self.csv_path, self.columns, self.engine))
+
+    def refresh(self):
+        """Forget loaded columns so the next access sees the current file."""
+        self._loaded.clear()
+        self._meta = None
+
+
+def open_log(csv_path, columns=ANALYSIS_COLUMNS, engine='auto', cache=True):
+    """
+    Return a LogView over `columns` of the log. `engine` is one of
+    sensor_log.load_columns()'s engines; with 'auto' and cache=True columns
+    come from the memory-mapped <csv_path>.cols sidecar.
+    """
+    return LogView(csv_path, columns, engine, cache)
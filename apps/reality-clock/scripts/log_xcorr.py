@@ -0,0 +1,122 @@
+"""
+Lagged cross-correlation between the logged channels.
+
+calculate_phi() treats the three bands as independent readings, and a
+drifting phi_current could equally come from the environment or from the
+Flipper itself warming up or its battery sagging. For every pair of
+XCORR_COLUMNS this computes the correlation at every lag up to max_lag,
+and reports where it peaks.
+
+Each channel is standardized and transformed once, zero-padded so the
+circular correlation doesn't wrap within max_lag; each pair is then one
+inverse FFT of the product of spectra, so the whole matrix is O(n log n)
+rather than O(n * lags). Needs NumPy.
+"""
+
+from sensor_log import have_numpy, np
+
+XCORR_COLUMNS = ('rssi_315', 'rssi_433', 'rssi_868', 'temperature', 'voltage', 'phi_current')
+MAX_LAG_SECONDS = 3600
+WEAK_CORRELATION = 0.1  # below this a peak's lag says nothing about who leads
+
+
+def _standardize(values):
+    """Zero-mean, unit-variance float64 copy; masked cells become 0 (the mean)."""
+    if isinstance(values, np.ma.MaskedArray):
+        mean = values.mean()
+        x = values.astype(np.float64).filled(mean if mean is not np.ma.masked else 0.0)
+    else:
+        x = np.asarray(values, dtype=np.float64)
+    x = x - x.mean()
+    std = x.std()
+    return x / std if std > 0 else None
+
+
+def cross_correlation(data, max_lag, columns=XCORR_COLUMNS):
+    """
+    Normalized cross-correlation of every pair of row-aligned `columns` in
+    `data` for lags -max_lag..max_lag. Returns {(a, b): array} where entry
+    max_lag + k is corr(a[t + k], b[t]), so a peak at positive k means a
+    follows b by k samples. Constant or missing columns are left out.
+    """
+    if not have_numpy():
+        raise RuntimeError("numpy is not installed (pip install numpy)")
+    channels = {}
+    for column in columns:
+        if column in data and len(data[column]):
+            x = _standardize(data[column])
+            if x is not None:
+                channels[column] = x
+    if not channels:
+        return {}
+    n = min(len(x) for x in channels.values())
+    max_lag = min(max_lag, n - 1)
+    size = 1 << (n + max_lag - 1).bit_length()
+    spectra = {c: np.fft.rfft(x[:n], size) for c, x in channels.items()}
+
+    names = list(spectra)
+    result = {}
+    for i, a in enumerate(names):
+        for b in names[i + 1:]:
+            r = np.fft.irfft(spectra[a] * np.conj(spectra[b]), size) / n
+            result[(a, b)] = np.concatenate((r[size - max_lag:], r[:max_lag + 1]))
+    return result
+
+
+def peak_correlation(r):
+    """(lag, correlation) where |r| is largest, and the zero-lag correlation."""
+    max_lag = len(r) // 2
+    best = int(np.argmax(np.abs(r)))
+    return best - max_lag, float(r[best]), float(r[max_lag])
+
+
+def print_xcorr_report(data, interval, max_lag_seconds=MAX_LAG_SECONDS):
+    """
+    Print the peak correlation and lag of every channel pair as a matrix,
+    then the channels that move with phi_current. `interval` is the sample
+    spacing in seconds.
+    """
+    if not have_numpy():
+        print("Cross-correlation needs numpy (pip install numpy)\n")
+        return None
+    max_lag = max(1, int(max_lag_seconds / interval))
+    pairs = cross_correlation(data, max_lag)
+    if not pairs:
+        return None
+    peaks = {pair: peak_correlation(r) for pair, r in pairs.items()}
+    names = [c for c in XCORR_COLUMNS if any(c in pair for pair in pairs)]
+
+    max_lag = len(next(iter(pairs.values()))) // 2
+    print(f"CROSS-CORRELATION (peak within +/-{max_lag * interval:g} s, lag in s):")
+    print("-" * 50)
+    print(f"{'':14}" + ''.join(f"{c:>16}" for c in names))
+    for a in names:
+        cells = ''
+        for b in names:
+            if (a, b) in peaks:
+                lag, corr, _ = peaks[(a, b)]
+            elif (b, a) in peaks:
+                lag, corr, _ = peaks[(b, a)]
+                lag = -lag
+            else:
+                cells += f"{'-':>16}"
+                continue
+            cells += f"{corr:+8.3f} @{lag * interval:+6.0f}"
+        print(f"{a:14}{cells}")
+
+    print("\nphi_current against the other channels:")
+    print(f"{'':14} {'PEAK':>8} {'LAG (s)':>10} {'AT LAG 0':>9}")
+    rows = []
+    for (a, b), (lag, corr, zero) in peaks.items():
+        if 'phi_current' in (a, b):
+            other = b if a == 'phi_current' else a
+            # Positive lag: phi_current follows the other channel.
+            rows.append((other, corr, lag if a == 'phi_current' else -lag, zero))
+    for other, corr, lag, zero in sorted(rows, key=lambda row: -abs(row[1])):
+        if abs(corr) < WEAK_CORRELATION:
+            lead = "weak"
+        else:
+            lead = f"{other} leads" if lag > 0 else "phi leads" if lag < 0 else "in step"
+        print(f"{other:14} {corr:+8.3f} {lag * interval:10g} {zero:+9.3f}  {lead}")
+    print()
+    return peaks
@@ -0,0 +1,115 @@
+"""
+Multi-process parsing of large sensor logs.
+
+The file is split into byte ranges that end on a newline, and each worker
+process maps the file itself and runs the same block scanner as
+sensor_log.scan_columns_mmap() over its ranges, so only offsets and results
+cross the process boundary. Each range comes back as column arrays plus
+RunningStats and KllSketches, which are merged in file order: the
+concatenated columns are identical to the single-process scan, and the
+merged counts, minima and maxima are exact (means and deviations agree up
+to float rounding).
+"""
+
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from log_stats import KllSketch, RunningStats
+from sensor_log import (
+    ANALYSIS_COLUMNS,
+    SCAN_BLOCK_SIZE,
+    _block_ranges,
+    _empty_columns,
+    _scan_block,
+    have_numpy,
+    mapped_header,
+    np,
+    scan_columns_mmap,
+)
+
+MIN_RANGE_SIZE = 4 * 1024 * 1024  # below this a worker costs more than it saves
+RANGES_PER_WORKER = 4  # smooths out uneven progress between workers
+
+
+def _scan_range(csv_path, start, end, targets, n_fields, keep_columns):
+    """Worker: parse buf[start:end] and return (columns, stats, sketches)."""
+    with open(csv_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        buf = np.frombuffer(mm, dtype=np.uint8)
+        try:
+            block = {}
+            for s, e in _block_ranges(buf, start, SCAN_BLOCK_SIZE, end):
+                for name, values in _scan_block(buf, s, e, targets, n_fields).items():
+                    block.setdefault(name, []).append(values)
+        finally:
+            del buf
+    columns = {name: np.concatenate(parts) for name, parts in block.items()}
+    stats = {name: RunningStats.from_values(values) for name, values in columns.items()}
+    sketches = {name: KllSketch.from_values(values) for name, values in columns.items()}
+    return (columns if keep_columns else None), stats, sketches
+
+
+def _split(csv_path, workers):
+    """The log's header and the newline-aligned (start, end) ranges of its body."""
+    size = os.path.getsize(csv_path)
+    with open(csv_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        header, header_end = mapped_header(mm)
+        if header is None:
+            return None, []
+        buf = np.frombuffer(mm, dtype=np.uint8)
+        try:
+            range_size = max(MIN_RANGE_SIZE, -(-size // (workers * RANGES_PER_WORKER)))
+            ranges = list(_block_ranges(buf, header_end + 1, range_size))
+        finally:
+            del buf
+    return header, ranges
+
+
+def scan_columns_parallel(csv_path, columns=ANALYSIS_COLUMNS, workers=None,
+                          keep_columns=True):
+    """
+    Parse `columns` of the log in `workers` processes (default: one per CPU).
+
+    Returns (data, stats, sketches): data maps each column to the same
+    array scan_columns_mmap() would return (None with keep_columns=False,
+    which avoids shipping the arrays back from the workers), stats and
+    sketches map it to a merged RunningStats and KllSketch.
+    """
+    if not have_numpy():
+        raise RuntimeError("numpy is not installed (pip install numpy)")
+    workers = workers or os.cpu_count() or 1
+    if os.path.getsize(csv_path) == 0:
+        header, ranges = None, []
+    else:
+        header, ranges = _split(csv_path, workers)
+
+    if header is None or len(ranges) < 2 or workers == 1:
+        data = scan_columns_mmap(csv_path, columns)
+        stats = {c: RunningStats.from_values(values) for c, values in data.items()}
+        sketches = {c: KllSketch.from_values(values) for c, values in data.items()}
+        return (data if keep_columns else None), stats, sketches
+
+    targets = [(c, header.index(c)) for c in columns if c in header]
+    pieces = {c: [] for c, _ in targets}
+    stats = {c: RunningStats() for c in columns}
+    sketches = {c: KllSketch() for c in columns}
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        futures = [pool.submit(_scan_range, csv_path, start, end, targets, len(header),
+                               keep_columns)
+                   for start, end in ranges]
+        # Merge in file order so the result doesn't depend on scheduling.
+        for future in futures:
+            part_columns, part_stats, part_sketches = future.result()
+            for c, part in part_stats.items():
+                stats[c].merge(part)
+                sketches[c].merge(part_sketches[c])
+                if keep_columns:
+                    pieces[c].append(part_columns[c])
+
+    if not keep_columns:
+        return None, stats, sketches
+    data = _empty_columns(columns)
+    for c, parts in pieces.items():
+        if parts:
+            data[c] = np.concatenate(parts)
+    return data, stats, sketches
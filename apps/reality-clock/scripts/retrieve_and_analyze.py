@@ -5,100 +5,207 @@ This script connects to the Flipper via serial, downloads the log file,
 and performs statistical analysis to determine optimal constants.
 """
 
+import argparse
+import asyncio
 import os
 import sys
 import time
-import glob
-import csv
-import statistics
 from pathlib import Path
 
-# Find Flipper serial port
-def find_flipper_port():
-    """Find the Flipper Zero's serial port."""
-    patterns = [
-        '/dev/cu.usbmodemflip*',  # macOS
-        '/dev/ttyACM*',  # Linux
-        'COM*',  # Windows
-    ]
-    for pattern in patterns:
-        ports = glob.glob(pattern)
-        for port in ports:
-            if 'flip' in port.lower():
-                return port
-        if ports:
-            return ports[0]
-    return None
-
-def download_log_via_cli(output_path):
+from flipper_cli import (
+    CLI_BAUD,
+    CLI_TIMEOUT,
+    LOG_REMOTE_PATH,
+    CsvStreamParser,
+    FlipperCliError,
+    FlipperCliSession,
+)
+from flipper_ports import device_serial, find_flipper_port
+from flipper_async import download_log_async
+from fleet import device_log_path, download_fleet
+from log_sync import DEFAULT_CHUNK_SIZE, download_log_chunked, sync_log_tail
+from log_allan import print_allan_report, sample_interval
+from log_changepoint import CHANGEPOINT_COLUMNS, print_changepoint_report
+from log_incremental import update_aggregates
+from log_merge import find_logs, merged_stats, print_session_summary, session_names
+from log_rolling import BUFFER_SIZE, print_rolling_report
+from log_spectrum import SPECTRUM_COLUMNS, print_spectrum_report
+from log_stats import KllSketch, stream_stats
+from log_view import open_log
+from log_xcorr import print_xcorr_report
+from parallel_scan import scan_columns_parallel
+from sensor_log import ANALYSIS_COLUMNS, exact_percentiles, restore_precision, summarize
+
+PERCENTILES = (5, 25, 50, 75, 95)
+IQR_TO_SIGMA = 1.349  # IQR of a normal distribution in standard deviations
+
+def download_log_via_cli(output_path, transfer='framed', chunk_size=DEFAULT_CHUNK_SIZE,
+                         delete_after=False, device=None, port=None):
     """
     Download the sensor log using Flipper CLI.
     Note: This requires the app to be closed so the file is synced.
+
+    transfer='framed' reads the `Size:` header and then exactly that many
+    bytes; 'async' does the same on the asyncio transport (flipper_async.py);
+    'chunked' uses resumable, CRC-checked `read_chunks` transfers
+    (see log_sync.py); 'poll' keeps the old poll-until-quiet behaviour.
+    With delete_after=True the log is removed from the SD card once it has
+    been downloaded completely (framed and chunked transfers only).
+    `device` selects a Flipper by its USB serial string; `port` skips
+    discovery altogether.
     """
     import serial
 
-    port = find_flipper_port()
+    port = port or find_flipper_port(device)
     if not port:
-        print("ERROR: Flipper Zero not found. Please connect it via USB.")
+        print(_not_found_message(device))
         return False
 
     print(f"Found Flipper at: {port}")
 
     try:
-        ser = serial.Serial(port, 230400, timeout=5)
-        time.sleep(0.5)
-
-        # Send storage read command
-        cmd = b"storage read /ext/apps_data/reality_clock/sensor_log.csv\r\n"
-        ser.write(cmd)
-        ser.flush()
-
-        # Read response
-        time.sleep(1)
-        data = ser.read(ser.in_waiting or 1)
-
-        # Keep reading until we get all data
-        while True:
-            time.sleep(0.5)
-            more = ser.read(ser.in_waiting or 1)
-            if not more:
-                break
-            data += more
-
-        ser.close()
-
-        # Parse the response
-        text = data.decode('utf-8', errors='ignore')
-
-        # Find the CSV content (between "Size:" line and next prompt)
-        lines = text.split('\n')
-        csv_lines = []
-        in_csv = False
-
-        for line in lines:
-            if line.startswith('timestamp_ms'):
-                in_csv = True
-            if in_csv:
-                if line.strip().startswith('>') or 'storage' in line.lower():
-                    break
-                if line.strip():
-                    csv_lines.append(line.strip())
-
-        if csv_lines:
-            with open(output_path, 'w') as f:
-                f.write('\n'.join(csv_lines))
-            print(f"Downloaded {len(csv_lines)} lines to {output_path}")
+        if transfer == 'async':
+            size = asyncio.run(download_log_async(port, output_path))
+            print(f"Downloaded {size} bytes to {output_path}")
             return True
-        else:
-            print("No CSV data found in response")
-            return False
+
+        if transfer == 'poll':
+            ser = serial.Serial(port, CLI_BAUD, timeout=CLI_TIMEOUT)
+            try:
+                return _download_polling(ser, output_path)
+            finally:
+                ser.close()
+
+        with FlipperCliSession(port) as cli:
+            if transfer == 'chunked':
+                ok = download_log_chunked(cli.ser, output_path, chunk_size=chunk_size)
+            else:
+                ok = _download_framed(cli, output_path)
+            if ok and delete_after:
+                cli.remove(LOG_REMOTE_PATH)
+                print(f"Removed {LOG_REMOTE_PATH} from the Flipper")
+            return ok
 
     except Exception as e:
         print(f"Error: {e}")
         return False
 
-def analyze_log(csv_path):
-    """Analyze the sensor log and determine optimal constants."""
+def sync_log_via_cli(sync_root, device=None):
+    """
+    Incrementally sync the sensor log into <sync_root>/<serial>/sensor_log.csv,
+    appending only what the app wrote since the last sync from that device
+    (see log_sync.py). Returns (local path, device id), or None on failure.
+    """
+    port = find_flipper_port(device)
+    if not port:
+        print(_not_found_message(device))
+        return None
+
+    serial_number = device_serial(port)
+    device_id = serial_number or port
+    print(f"Found Flipper at: {port} ({device_id})")
+
+    local_path = device_log_path(sync_root, port, serial_number)
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    try:
+        with FlipperCliSession(port) as cli:
+            if sync_log_tail(cli.ser, local_path, device_id) is None:
+                return None
+            return local_path, device_id
+
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+
+def _not_found_message(device):
+    if device:
+        return f"ERROR: No Flipper Zero with serial {device} found."
+    return "ERROR: Flipper Zero not found. Please connect it via USB."
+
+def _download_framed(cli, output_path):
+    """Read the size header, then exactly that many bytes straight to disk."""
+    part_path = output_path + '.part'
+    try:
+        with open(part_path, 'wb') as f:
+            size = cli.read(LOG_REMOTE_PATH, f)
+        os.replace(part_path, output_path)
+    except FlipperCliError as e:
+        print(e)
+        return False
+    finally:
+        # Also covers a SerialException from an unplugged cable.
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+    print(f"Downloaded {size} bytes to {output_path}")
+    return True
+
+def _download_polling(ser, output_path):
+    """
+    Legacy transfer: read until the trailing prompt (or the port goes quiet),
+    streaming CSV lines to disk as they arrive.
+    """
+    time.sleep(0.5)
+
+    # Send storage read command
+    cmd = f"storage read {LOG_REMOTE_PATH}\r\n".encode()
+    ser.write(cmd)
+    ser.flush()
+
+    part_path = output_path + '.part'
+    try:
+        with open(part_path, 'w') as f:
+            parser = CsvStreamParser(f)
+            while not parser.done:
+                more = ser.read(ser.in_waiting or 1)
+                if not more:
+                    break
+                parser.feed(more)
+            parser.close()
+        if parser.lines:
+            os.replace(part_path, output_path)
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+    if parser.lines:
+        print(f"Downloaded {parser.lines} lines to {output_path}")
+        return True
+    else:
+        print("No CSV data found in response")
+        return False
+
+def analyze_log(csv_path, engine='auto', cache=True, rolling=None, percentiles=PERCENTILES,
+                allan=False, spectrum=False, xcorr=False, changepoints=False):
+    """
+    Analyze the sensor log and determine optimal constants.
+
+    engine='numpy' parses the columns into typed arrays and reduces them
+    vectorized; 'mmap' parses them straight out of the memory-mapped file,
+    dropping torn rows instead of falling back to the slow path; 'masked'
+    does the same but keeps rows with unparseable cells, masking just those
+    cells so every column stays row-aligned; 'parallel' runs that scan over
+    newline-aligned ranges in one process per CPU and merges the partial
+    moments; 'python' uses the csv and statistics modules; 'stream' makes a
+    single pass with running moments and keeps no samples in memory; 'auto'
+    picks numpy when it's installed.
+
+    With engine='auto' and cache=True the parsed columns are kept in a
+    binary sidecar (<csv_path>.cols) and memory-mapped on later runs.
+
+    rolling=N adds windowed statistics over N-sample windows, like the
+    firmware's RollingBuffer (not available with 'stream' or 'parallel').
+    allan=True adds the Allan deviation of each column at octave-spaced
+    averaging times, with the BUFFER_SIZE/EMA_ALPHA they suggest (same
+    engines as rolling). spectrum=True adds Welch power spectra of the
+    RSSI bands with their dominant periods, and xcorr=True the lagged
+    cross-correlation of bands, temperature, voltage and phi_current, and
+    changepoints=True the regime shifts in phi_current and stability found
+    offline and by an online CUSUM (all three need numpy).
+    Every engine also reports `percentiles` and median/IQR-based constants,
+    exact where the columns are in memory and from KLL quantile sketches
+    for 'stream' and 'parallel'.
+    """
 
     if not os.path.exists(csv_path):
         print(f"Log file not found: {csv_path}")
@@ -108,28 +215,104 @@ def analyze_log(csv_path):
     print("SENSOR DATA ANALYSIS")
     print(f"{'='*60}\n")
 
+    if engine == 'stream':
+        sketches = {}
+        running = stream_stats(csv_path, ANALYSIS_COLUMNS, sketches)
+        stats = {key: r.summary() for key, r in running.items()}
+        results = report_stats(stats, running['rssi_315'].count)
+        results['percentiles'] = report_quantiles(sketches, percentiles)
+        return results
+
+    if engine == 'parallel':
+        _, running, sketches = scan_columns_parallel(csv_path, ANALYSIS_COLUMNS,
+                                                     keep_columns=False)
+        stats = {key: r.summary() for key, r in running.items()}
+        results = report_stats(stats, running['rssi_315'].count)
+        results['percentiles'] = report_quantiles(sketches, percentiles)
+        return results
+
     # Read CSV
-    data = {
-        'rssi_315': [],
-        'rssi_433': [],
-        'rssi_868': [],
-        'temperature': [],
-        'voltage': [],
-        'phi_current': [],
-        'match_pct': []
-    }
+    data = open_log(csv_path, ANALYSIS_COLUMNS, engine, cache)
+    columns = {key: restore_precision(key, values) for key, values in data.items()}
+    stats = {key: summarize(values) for key, values in columns.items()}
+
+    results = report_stats(stats, data.rows)
+    # Quantiles and windows run over the valid samples of each column.
+    valid = {key: values.compressed() if hasattr(values, 'compressed') else values
+             for key, values in columns.items()}
+    # The samples are in memory, so their percentiles are exact.
+    results['percentiles'] = report_quantiles(valid, percentiles)
+    if rolling:
+        print_rolling_report(valid, rolling)
+    if allan or xcorr:
+        timestamps = open_log(csv_path, ('timestamp_ms',), engine, cache)['timestamp_ms']
+        interval = sample_interval(timestamps)
+    if allan:
+        print_allan_report(valid, interval)
+    if spectrum:
+        # Load the bands again together with timestamp_ms so rows line up
+        # whichever rows the engine drops.
+        bands = open_log(csv_path, ('timestamp_ms',) + SPECTRUM_COLUMNS, engine, cache)
+        print_spectrum_report({key: restore_precision(key, bands[key]) for key in SPECTRUM_COLUMNS},
+                              bands['timestamp_ms'])
+    if xcorr:
+        print_xcorr_report(columns, interval)
+    if changepoints:
+        # stability isn't an analysis column; load it with timestamp_ms.
+        shifts = open_log(csv_path, ('timestamp_ms',) + CHANGEPOINT_COLUMNS, engine, cache)
+        print_changepoint_report({key: restore_precision(key, shifts[key])
+                                  for key in CHANGEPOINT_COLUMNS}, shifts['timestamp_ms'])
+    return results
+
+def analyze_log_incremental(csv_path, device=None, percentiles=PERCENTILES):
+    """
+    Update the persisted aggregates of `csv_path` with the rows appended
+    since the last run (see log_incremental.py) and print the report from
+    them, plus quantiles. Cost is proportional to the new rows only.
+    """
+    if not os.path.exists(csv_path):
+        print(f"Log file not found: {csv_path}")
+        return None
 
-    with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                for key in data.keys():
-                    if key in row:
-                        data[key].append(float(row[key]))
-            except (ValueError, KeyError):
-                continue
+    state, new_rows = update_aggregates(csv_path, device, ANALYSIS_COLUMNS)
+
+    print(f"\n{'='*60}")
+    print(f"SENSOR DATA ANALYSIS (incremental, {new_rows} new rows)")
+    print(f"{'='*60}\n")
+
+    stats = {key: r.summary() for key, r in state['stats'].items()}
+    results = report_stats(stats, state['stats']['rssi_315'].count)
+    results['percentiles'] = report_quantiles(state['sketches'], percentiles)
+    return results
 
-    total_samples = len(data['rssi_315'])
+def analyze_logs(pattern, percentiles=PERCENTILES):
+    """
+    Analyze every log matching a glob pattern (or below a directory) as one
+    timestamp-ordered stream: per-session summaries, then the full report
+    over the pooled data.
+    """
+    paths = find_logs(pattern)
+    if not paths:
+        print(f"No logs found for: {pattern}")
+        return None
+
+    print(f"\n{'='*60}")
+    print(f"SENSOR DATA ANALYSIS ({len(paths)} logs)")
+    print(f"{'='*60}\n")
+
+    sessions, pooled = merged_stats(paths, ANALYSIS_COLUMNS)
+    print_session_summary(session_names(paths), sessions)
+
+    stats = {key: r.summary() for key, r in pooled['stats'].items()}
+    results = report_stats(stats, pooled['stats']['rssi_315'].count)
+    results['percentiles'] = report_quantiles(pooled['sketches'], percentiles)
+    return results
+
+def report_stats(stats, total_samples):
+    """
+    Print the analysis report and recommended constants from per-column
+    summaries (count/mean/std/min/max dicts, None for empty columns).
+    """
     duration_sec = total_samples  # 1 sample/sec
 
     print(f"Total Samples: {total_samples}")
@@ -148,35 +331,36 @@ def analyze_log(csv_path):
 
     band_stats = {}
     for name, key in bands:
-        if data[key]:
-            avg = statistics.mean(data[key])
-            std = statistics.stdev(data[key]) if len(data[key]) > 1 else 0
-            min_val = min(data[key])
-            max_val = max(data[key])
+        if stats.get(key):
+            avg = stats[key]['mean']
+            std = stats[key]['std']
+            min_val = stats[key]['min']
+            max_val = stats[key]['max']
             band_stats[key] = {'avg': avg, 'std': std, 'min': min_val, 'max': max_val}
             print(f"{name:12} Avg: {avg:7.2f}  Std: {std:5.2f}  Range: [{min_val:.1f}, {max_val:.1f}]")
 
     print()
 
     # Temperature
-    if data['temperature']:
-        temp_avg = statistics.mean(data['temperature'])
-        temp_std = statistics.stdev(data['temperature']) if len(data['temperature']) > 1 else 0
+    if stats.get('temperature'):
+        temp_avg = stats['temperature']['mean']
+        temp_std = stats['temperature']['std']
         print(f"Temperature: Avg: {temp_avg:.1f}°C  Std: {temp_std:.2f}°C")
 
     # Voltage
-    if data['voltage']:
-        volt_avg = statistics.mean(data['voltage'])
+    if stats.get('voltage'):
+        volt_avg = stats['voltage']['mean']
         print(f"Battery:     Avg: {volt_avg:.3f}V")
 
     print()
 
     # PHI Analysis
-    if data['phi_current']:
-        phi_avg = statistics.mean(data['phi_current'])
-        phi_std = statistics.stdev(data['phi_current']) if len(data['phi_current']) > 1 else 0
-        phi_min = min(data['phi_current'])
-        phi_max = max(data['phi_current'])
+    phi = stats.get('phi_current')
+    if phi:
+        phi_avg = phi['mean']
+        phi_std = phi['std']
+        phi_min = phi['min']
+        phi_max = phi['max']
 
         print("PHI ANALYSIS:")
         print("-" * 50)
@@ -203,7 +387,7 @@ def analyze_log(csv_path):
                 var = band_stats[key]['std'] * 2  # 2-sigma range
                 print(f"#define VAR_{key.upper().replace('RSSI_', '')}   {var:.1f}f  /* 2-sigma variation */")
 
-    if data['phi_current']:
+    if phi:
         print(f"\n/* PHI baseline (use this as the 'home' dimension baseline) */")
         print(f"#define PHI_BASELINE     {phi_avg:.6f}f")
         print(f"#define PHI_TOLERANCE    {phi_std * 2:.6f}f  /* 2-sigma for HOME threshold */")
@@ -225,11 +409,139 @@ def analyze_log(csv_path):
         'samples': total_samples,
         'duration_sec': duration_sec,
         'bands': band_stats,
-        'phi_avg': phi_avg if data['phi_current'] else None,
-        'phi_std': phi_std if data['phi_current'] else None
+        'phi_avg': phi_avg if phi else None,
+        'phi_std': phi_std if phi else None
     }
 
-def main():
+def report_quantiles(columns, percentiles=PERCENTILES):
+    """
+    Print percentiles of each column and median/IQR-based alternatives to
+    the mean/2-sigma constants, which a few interference bursts can't drag
+    around. `columns` maps to a KllSketch (estimated quantiles) or to the
+    values themselves (exact). Returns {column: {percentile: value}}.
+    """
+    qs = sorted(set(percentiles) | {25, 50, 75})
+    table = {}
+    for key, source in columns.items():
+        if isinstance(source, KllSketch):
+            values = source.quantiles([q / 100 for q in qs]) if source.count else None
+        else:
+            values = exact_percentiles(source, qs)
+        if values is not None:
+            table[key] = dict(zip(qs, values))
+
+    print("\nPERCENTILES:")
+    print("-" * 50)
+    print(f"{'':14}" + ''.join(f"{f'p{q:g}':>11}" for q in percentiles))
+    for key, values in table.items():
+        print(f"{key:14}" + ''.join(f"{values[q]:11.4f}" for q in percentiles))
+
+    print("\nROBUST CONSTANTS (median / IQR):")
+    print("=" * 60)
+
+    bands = [
+        ('315 MHz', 'rssi_315'),
+        ('433 MHz', 'rssi_433'),
+        ('868 MHz', 'rssi_868'),
+    ]
+    if any(key in table for _, key in bands):
+        print("\n/* Real sensor base values (median of collected data) */")
+        for name, key in bands:
+            if key in table:
+                print(f"#define BASE_{key.upper().replace('RSSI_', '')}  {table[key][50]:.1f}f  /* Median RSSI at {name} */")
+
+        print("\n/* Variance for each band */")
+        for name, key in bands:
+            if key in table:
+                var = (table[key][75] - table[key][25]) / IQR_TO_SIGMA * 2
+                print(f"#define VAR_{key.upper().replace('RSSI_', '')}   {var:.1f}f  /* 2-sigma equivalent from IQR */")
+
+    phi = table.get('phi_current')
+    if phi:
+        print("\n/* PHI baseline (use this as the 'home' dimension baseline) */")
+        print(f"#define PHI_BASELINE     {phi[50]:.6f}f")
+        print(f"#define PHI_TOLERANCE    {(phi[75] - phi[25]) / IQR_TO_SIGMA * 2:.6f}f  /* 2-sigma equivalent from IQR */")
+
+    print("\n" + "=" * 60)
+    return table
+
+def _percentile_list(text):
+    """argparse type for --percentiles: comma-separated numbers from 0 to 100."""
+    try:
+        levels = [float(p) for p in text.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a comma-separated list of numbers: {text!r}")
+    for level in levels:
+        if not 0 <= level <= 100:
+            raise argparse.ArgumentTypeError(f"percentiles must be between 0 and 100, got {level:g}")
+    return levels
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Reality Clock sensor log retrieval and analysis")
+    parser.add_argument('--transfer', choices=['framed', 'async', 'chunked', 'poll'], default='framed',
+                        help="framed: read the Size: header then exact bytes (default); "
+                             "async: framed transfer on the asyncio transport; "
+                             "chunked: resumable, per-chunk verified transfer; "
+                             "poll: legacy read-until-quiet transfer")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"chunk size in bytes for --transfer chunked (default {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument('--device', metavar='SERIAL',
+                        help="talk to the Flipper with this USB serial string (e.g. flip_Name)")
+    parser.add_argument('--delete-after', action='store_true',
+                        help="remove the log from the Flipper after a complete download")
+    parser.add_argument('--fleet', action='store_true',
+                        help="download the log from every attached Flipper in parallel "
+                             "into fleet/<serial>/ and print a per-device summary")
+    parser.add_argument('--percentiles', type=_percentile_list,
+                        default=list(PERCENTILES), metavar='P,P,...',
+                        help="percentiles to report (default: 5,25,50,75,95)")
+    parser.add_argument('--rolling', type=int, nargs='?', const=BUFFER_SIZE, metavar='WINDOW',
+                        help=f"also report windowed statistics (default window: {BUFFER_SIZE}, "
+                             "the firmware's BUFFER_SIZE)")
+    parser.add_argument('--allan', action='store_true',
+                        help="also report the Allan deviation of each column and the "
+                             "BUFFER_SIZE/EMA_ALPHA it suggests")
+    parser.add_argument('--spectrum', action='store_true',
+                        help="also report power spectra of the RSSI bands, their dominant "
+                             "periods and a non-aliasing SAMPLE_INTERVAL_NORMAL_MS")
+    parser.add_argument('--xcorr', action='store_true',
+                        help="also report the lagged cross-correlation between the bands, "
+                             "temperature, voltage and phi_current")
+    parser.add_argument('--changepoints', action='store_true',
+                        help="also report where phi_current and stability shift regime "
+                             "(binary segmentation and online CUSUM)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="update the saved aggregates with new rows only (implied by --sync)")
+    parser.add_argument('--logs', metavar='GLOB_OR_DIR',
+                        help="analyze several logs merged in timestamp order, "
+                             "e.g. 'fleet' or 'captures/*.csv'")
+    parser.add_argument('--sync', action='store_true',
+                        help="fetch only what was appended since the last sync into "
+                             "fleet/<serial>/, then analyze")
+    parser.add_argument('--engine', choices=['auto', 'numpy', 'mmap', 'masked', 'parallel', 'python',
+                                             'stream'],
+                        default='auto',
+                        help="analysis backend (default: numpy if installed); "
+                             "mmap: zero-copy scan of the memory-mapped log; "
+                             "masked: mmap scan that masks bad cells instead of dropping rows; "
+                             "parallel: the mmap scan in one process per CPU; "
+                             "stream: single pass, constant memory")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="don't read or write the <log>.cols column cache")
+    args = parser.parse_args(argv)
+    if args.engine in ('stream', 'parallel'):
+        # These reports need the columns in memory, which both engines avoid.
+        reports = [flag for flag, wanted in (('--rolling', args.rolling), ('--allan', args.allan),
+                                             ('--spectrum', args.spectrum), ('--xcorr', args.xcorr),
+                                             ('--changepoints', args.changepoints))
+                   if wanted]
+        if reports:
+            parser.error(f"{', '.join(reports)} can't be used with --engine {args.engine}; "
+                         "use numpy, mmap, masked or python")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
     script_dir = Path(__file__).parent
     app_dir = script_dir.parent
     log_path = app_dir / "sensor_log.csv"
@@ -237,8 +549,26 @@ def main():
     print("Reality Clock Sensor Data Analyzer")
     print("=" * 60)
 
+    if args.fleet:
+        results = download_fleet(str(app_dir / "fleet"))
+        if not results or any(r['error'] for r in results):
+            sys.exit(1)
+        return
+
+    if args.logs:
+        analyze_logs(args.logs, args.percentiles)
+        return
+
+    device_id = args.device
+    if args.sync:
+        # Each device syncs into its own fleet/<serial>/ copy, alongside --fleet pulls.
+        synced = sync_log_via_cli(str(app_dir / "fleet"), args.device)
+        if not synced:
+            print("\nCould not sync the log.")
+            return
+        log_path, device_id = synced
     # Check if we have a local copy already
-    if log_path.exists():
+    elif log_path.exists():
         print(f"Found existing log at: {log_path}")
         choice = input("Use existing file? (y/n): ").strip().lower()
         if choice != 'y':
@@ -257,7 +587,8 @@ def main():
         print(f"   to: {log_path}")
         print("\nTrying to download via CLI...")
 
-        if download_log_via_cli(str(log_path)):
+        if download_log_via_cli(str(log_path), args.transfer, args.chunk_size,
+                                args.delete_after, args.device):
             print("Download successful!")
         else:
             print("\nCould not download automatically.")
@@ -265,7 +596,13 @@ def main():
             return
 
     # Analyze the data
-    results = analyze_log(str(log_path))
+    if args.sync or args.incremental:
+        results = analyze_log_incremental(str(log_path), device_id, args.percentiles)
+    else:
+        results = analyze_log(str(log_path), args.engine, cache=not args.no_cache,
+                              rolling=args.rolling, percentiles=args.percentiles,
+                              allan=args.allan, spectrum=args.spectrum, xcorr=args.xcorr,
+                              changepoints=args.changepoints)
 
     if results and results['samples'] < 300:
         print(f"\nWARNING: Only {results['samples']} samples collected.")
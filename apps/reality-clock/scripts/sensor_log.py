@@ -0,0 +1,510 @@
+"""
+Schema and column loaders for the Reality Clock sensor log.
+
+The log is written by debug_log_write() in reality_clock.c with a fixed
+header and one line per sample. NumPy is optional: load_columns() uses it
+when it's installed and falls back to the csv module otherwise.
+"""
+
+import csv
+import math
+import mmap
+import os
+import statistics
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Column order of debug_log_write()
+LOG_COLUMNS = (
+    'timestamp_ms',
+    'sample_num',
+    'rssi_315',
+    'rssi_433',
+    'rssi_868',
+    'temperature',
+    'voltage',
+    'phi_current',
+    'phi_baseline',
+    'phi_short',
+    'stability',
+    'match_pct',
+)
+INT_COLUMNS = ('timestamp_ms', 'sample_num')
+
+# Decimal places debug_log_write() prints for each float column
+LOG_DECIMALS = {
+    'rssi_315': 2,
+    'rssi_433': 2,
+    'rssi_868': 2,
+    'temperature': 2,
+    'voltage': 3,
+    'phi_current': 6,
+    'phi_baseline': 6,
+    'phi_short': 6,
+    'stability': 2,
+    'match_pct': 2,
+}
+
+# Columns analyze_log reports on
+ANALYSIS_COLUMNS = (
+    'rssi_315',
+    'rssi_433',
+    'rssi_868',
+    'temperature',
+    'voltage',
+    'phi_current',
+    'match_pct',
+)
+
+
+def have_numpy():
+    return np is not None
+
+
+def read_header(csv_path):
+    """Return the column names from the first line of the log."""
+    with open(csv_path, 'r') as f:
+        return f.readline().strip().split(',')
+
+
+class Column:
+    """
+    The samples of one log column in a typed array: uint32 for
+    timestamp_ms/sample_num, float32 for columns whose logged decimals fit
+    in it (like the firmware's RollingBuffer), float64 otherwise. That is
+    4 bytes per value instead of ~32 for a list of floats.
+
+    Iterating or indexing a float32 column rounds each value back to the
+    logged decimals, so it yields the same floats the CSV text parses to.
+    tolist() does that rounding for the whole column at once; use it when
+    the values are read more than once.
+    """
+
+    __slots__ = ('name', 'values', 'decimals')
+
+    def __init__(self, name, values=()):
+        self.name = name
+        self.decimals = LOG_DECIMALS.get(name)
+        typecode = 'I' if name in INT_COLUMNS else 'd' if self.decimals is None else 'f'
+        self.values = array(typecode, values)
+
+    def append(self, value):
+        self.values.append(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._widen(v) for v in self.values[index]]
+        return self._widen(self.values[index])
+
+    def __iter__(self):
+        if self.values.typecode != 'f':
+            return iter(self.values)
+        decimals = self.decimals
+        return (round(v, decimals) for v in self.values)
+
+    def __repr__(self):
+        return f"Column({self.name!r}, {len(self)} x {self.values.typecode!r})"
+
+    def tolist(self):
+        """The values as a list of Python numbers, float32 ones rounded once."""
+        if self.values.typecode != 'f':
+            return self.values.tolist()
+        if np is not None:
+            widened = np.frombuffer(self.values, dtype=np.float32).astype(np.float64)
+            return np.round(widened, self.decimals).tolist()
+        decimals = self.decimals
+        return [round(v, decimals) for v in self.values]
+
+    def _widen(self, value):
+        return round(value, self.decimals) if self.values.typecode == 'f' else value
+
+    @property
+    def nbytes(self):
+        return self.values.itemsize * len(self.values)
+
+
+def parse_cell(column, text):
+    """
+    The value of one CSV field of `column`, or None where the array engines
+    would mask it: timestamp_ms/sample_num must be a uint32, the rest
+    finite floats.
+    """
+    try:
+        value = int(text) if column in INT_COLUMNS else float(text)
+    except ValueError:
+        return None
+    if column in INT_COLUMNS:
+        return value if 0 <= value <= 0xFFFFFFFF else None
+    return value if math.isfinite(value) else None
+
+
+def load_columns_python(csv_path, columns=ANALYSIS_COLUMNS):
+    """
+    Read the requested columns into compact Column arrays with the csv
+    module. As in scan_columns_mmap() without masking, a row with the wrong
+    number of fields (a torn write) or an unparseable requested cell is
+    dropped whole, so the columns stay row-aligned.
+    """
+    data = {key: Column(key) for key in columns}
+    with open(csv_path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        targets = [(key, data[key], header.index(key)) for key in columns if key in header]
+        for row in reader:
+            if len(row) != len(header):
+                continue
+            values = [parse_cell(key, row[index]) for key, _, index in targets]
+            if None in values:
+                continue
+            for (_, column, _), value in zip(targets, values):
+                column.append(value)
+    return data
+
+
+def load_columns_numpy(csv_path, columns=ANALYSIS_COLUMNS, start=None, end=None):
+    """
+    Parse the requested columns straight into typed NumPy arrays
+    (uint32 for timestamp_ms/sample_num, float64 otherwise) with
+    np.loadtxt. Columns missing from the header come back empty. `start`
+    and `end` limit the parse to a byte range of the body, as in
+    scan_columns_mmap(). If any row is malformed or a float cell isn't
+    finite, the range goes to the masked scan instead, so the same rows and
+    cells survive either way.
+    """
+    if os.path.getsize(csv_path) == 0:
+        return _empty_columns(columns)
+    with open(csv_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header, header_end = mapped_header(mm)
+            if header is None:
+                return _empty_columns(columns)
+            start = header_end + 1 if start is None else max(start, header_end + 1)
+            end = len(mm) if end is None else end
+            body = np.frombuffer(mm, dtype=np.uint8, count=max(0, end - start), offset=start)
+            try:
+                rows = int(np.count_nonzero(body == _NL)) + (len(body) > 0 and body[-1] != _NL)
+                commas = int(np.count_nonzero(body == _COMMA))
+            finally:
+                del body
+        if rows == 0:
+            return _empty_columns(columns)
+
+        present = [c for c in columns if c in header]
+        usecols = [header.index(c) for c in present]
+        dtype = [(c, np.uint32 if c in INT_COLUMNS else np.float64) for c in present]
+        # loadtxt ignores fields past the ones it's asked for, so the last
+        # field is parsed too (short rows fail) and the commas are counted
+        # (long rows fail), as the scanner drops both.
+        if len(header) - 1 not in usecols:
+            usecols.append(len(header) - 1)
+            dtype.append((' last', np.float64))
+        table = None
+        if commas == rows * (len(header) - 1):
+            # loadtxt reads a path faster than a file object, so only seek
+            # for a range that starts after the first row.
+            f.seek(start)
+            source = csv_path if start == header_end + 1 else f
+            try:
+                table = np.loadtxt(source, delimiter=',', skiprows=int(source is csv_path),
+                                   usecols=usecols, dtype=dtype, max_rows=rows, ndmin=1)
+            except ValueError:
+                pass
+        # loadtxt takes 'nan' and 'inf', which the scanner masks.
+        if table is not None and not all(np.isfinite(table[c]).all() for c in present
+                                         if c not in INT_COLUMNS):
+            table = None
+
+    if table is None:
+        # A malformed row or cell (e.g. a torn final write); mask just the
+        # bad cells.
+        return scan_columns_mmap(csv_path, columns, start=start, end=end, masked=True)
+    return {c: (np.ascontiguousarray(table[c]) if c in present else np.empty(0))
+            for c in columns}
+
+
+# -- memory-mapped scanner ----------------------------------------------------
+
+SCAN_BLOCK_SIZE = 32 * 1024 * 1024
+MAX_FIELD_WIDTH = 24
+_NL, _CR, _COMMA, _MINUS, _DOT, _ZERO = b'\n\r,-.0'
+_POW10 = 10.0 ** np.arange(MAX_FIELD_WIDTH + 1) if np is not None else None
+
+
+def _parse_fields(buf, start, end, integer):
+    """
+    Parse the decimal fields buf[start[i]:end[i]] without creating any
+    Python strings. Returns (values, ok) where ok marks fields that were
+    well-formed `-?digits[.digits]` (plain digits for integer columns).
+    """
+    n = len(start)
+    width = end - start
+    w = int(min(width.max(initial=0), MAX_FIELD_WIDTH))
+    if w == 0:
+        return np.zeros(n, dtype=np.uint32 if integer else np.float64), np.zeros(n, dtype=bool)
+
+    # Gather each field's bytes (padded to w) with one strided copy, then
+    # lay them out position-major so every step below works on contiguous
+    # rows of n fields. Fields within w bytes of the end of the buffer are
+    # gathered from a zero-padded copy of the tail.
+    last = len(buf) - w
+    head = start <= last
+    if last >= 0:
+        windows = np.lib.stride_tricks.sliding_window_view(buf, w)
+        rows = windows[np.where(head, start, 0)]
+    else:
+        rows = np.zeros((n, w), dtype=np.uint8)
+    if not head.all():
+        tail_from = max(last + 1, 0)
+        tail = np.zeros(len(buf) - tail_from + w, dtype=np.uint8)
+        tail[:len(buf) - tail_from] = buf[tail_from:]
+        rows[~head] = np.lib.stride_tricks.sliding_window_view(tail, w)[start[~head] - tail_from]
+    chars = np.ascontiguousarray(rows.T)
+    positions = np.arange(w)[:, None]
+    inside = positions < width[None, :]
+
+    minus = chars[0] == _MINUS
+    digits = chars - np.uint8(_ZERO)
+    is_digit = inside & (digits < 10)
+    is_dot = inside & (chars == _DOT)
+    bad = inside & ~is_digit & ~is_dot
+    if not integer:
+        # timestamp_ms and sample_num are uint32; only floats take a sign.
+        bad[0] &= ~minus
+    n_digits = is_digit.sum(axis=0)
+
+    ok = ((width > 0) & (width <= MAX_FIELD_WIDTH) & ~bad.any(axis=0)
+          & (is_dot.sum(axis=0) <= 1) & (n_digits > 0) & (n_digits <= 18))
+
+    mantissa = np.zeros(n, dtype=np.int64)
+    for p in range(w):
+        step = is_digit[p]
+        mantissa *= np.where(step, 10, 1)
+        mantissa += np.where(step, digits[p], 0)
+
+    if integer:
+        ok &= ~is_dot.any(axis=0) & (mantissa <= np.iinfo(np.uint32).max)
+        return np.where(ok, mantissa, 0).astype(np.uint32), ok
+
+    # Well-formed fields have only digits after the dot.
+    has_dot = is_dot.any(axis=0)
+    frac_digits = np.where(has_dot, width - 1 - is_dot.argmax(axis=0), 0).clip(0, MAX_FIELD_WIDTH)
+    values = mantissa / _POW10[frac_digits]
+    np.negative(values, out=values, where=minus)
+    return values, ok
+
+
+def _row_bounds(buf, start, end):
+    """Start/end offsets of the lines in buf[start:end] (newline excluded)."""
+    newlines = np.flatnonzero(buf[start:end] == _NL) + start
+    ends = newlines
+    starts = np.empty(len(newlines), dtype=np.int64)
+    if len(newlines):
+        starts[0] = start
+        starts[1:] = newlines[:-1] + 1
+    tail = newlines[-1] + 1 if len(newlines) else start
+    if tail < end:
+        # Unterminated final line (e.g. the app was killed mid-write).
+        starts = np.append(starts, tail)
+        ends = np.append(ends, end)
+    return starts, ends
+
+
+def _scan_block(buf, start, end, targets, n_fields, masked=False):
+    """
+    Parse the rows in buf[start:end] (which must begin at a line start) into
+    the target columns. Rows with the wrong number of fields are dropped.
+    A row with a target field that fails to parse is dropped too, so columns
+    stay aligned, unless `masked` is set: then every column comes back as a
+    MaskedArray with just the unparseable cells masked.
+    """
+    starts, ends = _row_bounds(buf, start, end)
+    commas = np.flatnonzero(buf[start:end] == _COMMA) + start
+    first = np.searchsorted(commas, starts)
+    complete = np.searchsorted(commas, ends) - first == n_fields - 1
+    starts, ends, first = starts[complete], ends[complete], first[complete]
+
+    # Field boundaries of complete rows: one row of comma offsets per field.
+    separators = commas[first[None, :] + np.arange(n_fields - 1)[:, None]]
+    line_end = ends - ((ends > starts) & (buf[np.maximum(ends - 1, 0)] == _CR))
+
+    parsed = {}
+    ok = np.ones(len(starts), dtype=bool)
+    for name, field in targets:
+        f_start = starts if field == 0 else separators[field - 1] + 1
+        f_end = line_end if field == n_fields - 1 else separators[field]
+        values, valid = _parse_fields(buf, f_start, f_end, name in INT_COLUMNS)
+        if masked:
+            parsed[name] = np.ma.MaskedArray(values, mask=~valid)
+        else:
+            parsed[name] = values
+            ok &= valid
+    if masked:
+        return parsed
+    return {name: values[ok] for name, values in parsed.items()}
+
+
+def _block_ranges(buf, body_start, block_size, size=None):
+    """Split buf[body_start:size] into ranges that end just after a newline."""
+    size = len(buf) if size is None else size
+    start = body_start
+    while start < size:
+        end = min(start + block_size, size)
+        if end < size:
+            newline = np.flatnonzero(buf[end:min(end + 65536, size)] == _NL)
+            while not len(newline) and end < size:
+                end = min(end + 65536, size)
+                newline = np.flatnonzero(buf[end:min(end + 65536, size)] == _NL)
+            end = end + int(newline[0]) + 1 if len(newline) else size
+        yield start, end
+        start = end
+
+
+def mapped_header(mm):
+    """Column names of a mapped log and the offset of the header's newline."""
+    header_end = mm.find(b'\n')
+    if header_end < 0:
+        return None, -1
+    return bytes(mm[:header_end]).decode('utf-8', errors='ignore').strip().split(','), header_end
+
+
+def _empty_columns(columns, masked=False):
+    empty = {c: np.empty(0, dtype=np.uint32 if c in INT_COLUMNS else np.float64)
+             for c in columns}
+    if masked:
+        return {c: np.ma.MaskedArray(values, mask=np.zeros(0, dtype=bool))
+                for c, values in empty.items()}
+    return empty
+
+
+def scan_columns_mmap(csv_path, columns=ANALYSIS_COLUMNS, block_size=SCAN_BLOCK_SIZE,
+                      start=None, end=None, masked=False):
+    """
+    Memory-map the log and parse only the requested columns straight out of
+    the mapped bytes, a block of rows at a time. Returns typed arrays like
+    load_columns_numpy(), minus any incomplete or unparseable rows.
+
+    With masked=True only incomplete rows (e.g. a torn write) are dropped:
+    each column is a MaskedArray whose mask marks the cells that failed to
+    parse, so one bad cell doesn't cost the rest of its row.
+
+    `start` and `end` limit the scan to a byte range of the body; `start`
+    must be the beginning of a line.
+    """
+    if os.path.getsize(csv_path) == 0:
+        return _empty_columns(columns, masked)
+    with open(csv_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        buf = np.frombuffer(mm, dtype=np.uint8)
+        try:
+            header, header_end = mapped_header(mm)
+            if header is None:
+                return _empty_columns(columns, masked)
+            targets = [(c, header.index(c)) for c in columns if c in header]
+
+            body_start = header_end + 1 if start is None else max(start, header_end + 1)
+
+            pieces = {c: [] for c, _ in targets}
+            for block_start, block_end in _block_ranges(buf, body_start, block_size, end):
+                block = _scan_block(buf, block_start, block_end, targets, len(header), masked)
+                for c, values in block.items():
+                    pieces[c].append(values)
+
+            result = _empty_columns(columns, masked)
+            concatenate = np.ma.concatenate if masked else np.concatenate
+            for c, parts in pieces.items():
+                if parts:
+                    result[c] = concatenate(parts)
+            return result
+        finally:
+            del buf
+
+
+def load_columns(csv_path, columns=ANALYSIS_COLUMNS, engine='auto'):
+    """
+    Load columns with engine 'numpy' (np.loadtxt into typed arrays), 'mmap'
+    (zero-copy scan of the mapped file), 'masked' (the same scan, keeping
+    rows with bad cells as masked arrays) or 'python' (Column arrays);
+    'auto' picks numpy when it's installed.
+    """
+    if engine == 'auto':
+        engine = 'numpy' if have_numpy() else 'python'
+    if engine in ('numpy', 'mmap', 'masked') and not have_numpy():
+        raise RuntimeError("numpy is not installed (pip install numpy)")
+    if engine == 'numpy':
+        return load_columns_numpy(csv_path, columns)
+    if engine in ('mmap', 'masked'):
+        return scan_columns_mmap(csv_path, columns, masked=engine == 'masked')
+    return load_columns_python(csv_path, columns)
+
+
+def restore_precision(column, values):
+    """
+    Widen a float32 column (e.g. from the column cache) back to the float64
+    values its CSV text parses to, by rounding to the logged decimals. A
+    Column becomes a list, rounded once for every later pass over it.
+    Anything else is returned unchanged.
+    """
+    if isinstance(values, Column):
+        return values.tolist()
+    if (np is None or not isinstance(values, np.ndarray) or values.dtype != np.float32
+            or column not in LOG_DECIMALS):
+        return values
+    return np.round(values.astype(np.float64), LOG_DECIMALS[column])
+
+
+def summarize(values):
+    """
+    Count, mean, sample standard deviation, min and max of a column, or None
+    for an empty one. Works on NumPy arrays (vectorized), masked arrays
+    (over the unmasked cells only) and plain sequences.
+    """
+    if np is not None and isinstance(values, np.ma.MaskedArray):
+        values = values.compressed()
+    n = len(values)
+    if n == 0:
+        return None
+    if np is not None and isinstance(values, np.ndarray):
+        values = values.astype(np.float64, copy=False)
+        return {
+            'count': n,
+            'mean': float(values.mean()),
+            'std': float(values.std(ddof=1)) if n > 1 else 0,
+            'min': float(values.min()),
+            'max': float(values.max()),
+        }
+    return {
+        'count': n,
+        'mean': statistics.mean(values),
+        'std': statistics.stdev(values) if n > 1 else 0,
+        'min': min(values),
+        'max': max(values),
+    }
+
+
+def exact_percentiles(values, levels):
+    """
+    Exact percentiles (0-100) of a column, interpolated linearly between
+    order statistics as np.percentile() does by default. Masked cells are
+    ignored; returns None for an empty column.
+    """
+    if np is not None and isinstance(values, np.ma.MaskedArray):
+        values = values.compressed()
+    n = len(values)
+    if n == 0:
+        return None
+    if np is not None and isinstance(values, np.ndarray):
+        return [float(v) for v in np.percentile(values.astype(np.float64, copy=False), levels)]
+    ordered = sorted(values)
+    result = []
+    for level in levels:
+        position = level / 100 * (n - 1)
+        low = int(position)
+        high = min(low + 1, n - 1)
+        result.append(ordered[low] + (ordered[high] - ordered[low]) * (position - low))
+    return result
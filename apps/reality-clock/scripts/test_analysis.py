@@ -0,0 +1,207 @@
+"""
+Checks of the analysis modules against naive reference implementations.
+
+Run from this directory with `python -m unittest test_analysis`.
+"""
+
+import math
+import random
+import statistics
+import unittest
+
+from log_allan import noise_floor, octave_taus, overlapping_adev, overlapping_adev_python
+from log_changepoint import binary_segmentation, cusum_alarms, noise_sigma
+from log_rolling import RSSI_OFFSET, replay_phi, rolling_stats, rolling_stats_python
+from log_spectrum import dominant_periods, resample_uniform, spectrogram, welch_psd
+from log_xcorr import cross_correlation, peak_correlation
+from sensor_log import have_numpy, np
+
+
+def noisy_series(n, seed=0, level=-96.0, sigma=1.65, drift=0.0):
+    rng = random.Random(seed)
+    return [round(level + drift * i / n + rng.gauss(0, sigma), 2) for i in range(n)]
+
+
+class RollingTest(unittest.TestCase):
+    """rolling_stats() against recomputing every window from scratch."""
+
+    def setUp(self):
+        self.values = noisy_series(400, seed=1, drift=3.0)
+
+    def naive(self, window):
+        result = {'mean': [], 'std': [], 'min': [], 'max': []}
+        for i in range(len(self.values)):
+            part = self.values[max(0, i - window + 1):i + 1]
+            result['mean'].append(statistics.mean(part))
+            result['std'].append(statistics.stdev(part) if len(part) > 1 else 0.0)
+            result['min'].append(min(part))
+            result['max'].append(max(part))
+        return result
+
+    def assertClose(self, got, want):
+        for key in want:
+            self.assertEqual(len(got[key]), len(want[key]), key)
+            for a, b in zip(got[key], want[key]):
+                self.assertAlmostEqual(float(a), b, places=9, msg=key)
+
+    def test_python_matches_naive(self):
+        for window in (1, 7, 64, 1000):
+            self.assertClose(rolling_stats_python(self.values, window), self.naive(window))
+
+    @unittest.skipUnless(have_numpy(), "needs numpy")
+    def test_numpy_matches_naive(self):
+        for window in (1, 7, 64, 1000):
+            self.assertClose(rolling_stats(self.values, window), self.naive(window))
+
+    @unittest.skipUnless(have_numpy(), "needs numpy")
+    def test_replay_phi_matches_calculate_phi(self):
+        bands = [noisy_series(300, seed, level) for seed, level in
+                 ((2, -99.4), (3, -96.1), (4, -112.8))]
+        phi = replay_phi(*bands, window=50)
+        for i in (0, 10, 49, 50, 299):
+            lf, hf, uhf = (10 ** ((statistics.mean(b[max(0, i - 49):i + 1]) + RSSI_OFFSET) / 20)
+                           for b in bands)
+            self.assertTrue(math.isclose(phi[i], lf * uhf / (hf * hf), rel_tol=1e-9))
+
+
+class AllanTest(unittest.TestCase):
+    """overlapping_adev() against averaging blocks explicitly."""
+
+    def naive(self, values, m):
+        averages = [statistics.fmean(values[i:i + m]) for i in range(len(values) - m + 1)]
+        differences = [averages[i + m] - averages[i] for i in range(len(averages) - m)]
+        return math.sqrt(statistics.fmean(d * d for d in differences) / 2)
+
+    def test_matches_naive(self):
+        values = noisy_series(600, seed=5, drift=2.0)
+        taus = octave_taus(len(values))
+        self.assertEqual(taus, [1, 2, 4, 8, 16, 32, 64, 128])
+        engines = [overlapping_adev_python] + ([overlapping_adev] if have_numpy() else [])
+        for engine in engines:
+            got_taus, deviations = engine(values)
+            self.assertEqual(got_taus, taus)
+            for m, deviation in zip(taus, deviations):
+                self.assertAlmostEqual(deviation, self.naive(values, m), places=9)
+
+    def test_white_noise_falls_like_sqrt_tau(self):
+        values = noisy_series(20000, seed=6, sigma=1.0)
+        taus, deviations = overlapping_adev_python(values, [1, 16])
+        self.assertAlmostEqual(deviations[0], 1.0, delta=0.05)
+        self.assertAlmostEqual(deviations[1], 0.25, delta=0.03)
+        self.assertEqual(noise_floor(taus, deviations)[::2], (16, True))
+
+
+@unittest.skipUnless(have_numpy(), "needs numpy")
+class SpectrumTest(unittest.TestCase):
+    """welch_psd() against a direct DFT of every segment."""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        t = np.arange(3000)
+        # A 50 s period (20 mHz at 1 Hz) in white noise.
+        self.x = 2.0 * np.sin(2 * np.pi * t / 50) + rng.normal(0, 1.0, len(t))
+
+    def naive(self, x, fs, segment):
+        n = np.arange(segment)
+        window = 0.5 - 0.5 * np.cos(2 * np.pi * n / (segment - 1))
+        dft = np.exp(-2j * np.pi * np.outer(np.arange(segment // 2 + 1), n) / segment)
+        periodograms = []
+        for start in range(0, len(x) - segment + 1, segment // 2):
+            part = x[start:start + segment]
+            periodograms.append(np.abs(dft @ ((part - part.mean()) * window)) ** 2)
+        psd = np.mean(periodograms, axis=0) * 2 / (fs * np.sum(window ** 2))
+        psd[0] /= 2
+        psd[-1] /= 2
+        return psd
+
+    def test_matches_naive_welch(self):
+        for fs, segment in ((1.0, 256), (5.0, 64)):
+            freqs, psd = welch_psd(self.x, fs, segment)
+            np.testing.assert_allclose(psd, self.naive(self.x, fs, segment), rtol=1e-9)
+            self.assertAlmostEqual(freqs[1], fs / segment)
+            times, _, power = spectrogram(self.x, fs, segment)
+            np.testing.assert_allclose(power.mean(axis=0), psd, rtol=1e-9)
+            self.assertAlmostEqual(times[0], segment / 2 / fs)
+
+    def test_finds_the_period(self):
+        freqs, psd = welch_psd(self.x, 1.0, 1024)
+        period, _, snr = dominant_periods(freqs, psd)[0]
+        self.assertAlmostEqual(period, 50.0, delta=0.5)
+        self.assertGreater(snr, 20)
+        # Total power: the sine's 2 plus the noise's 1, minus a little
+        # removed with each segment's mean.
+        self.assertAlmostEqual(float(np.sum(psd) * freqs[1]), 3.0, delta=0.15)
+
+    def test_resample_skips_masked_cells_and_restarts(self):
+        timestamps = np.ma.MaskedArray([0, 1000, 2100, 2900, 500, 4000],
+                                       mask=[False, False, False, False, False, False])
+        values = np.ma.MaskedArray([0.0, 1.0, 99.0, 3.0, 7.0, 4.0],
+                                   mask=[False, False, True, False, False, False])
+        grid, resampled = resample_uniform(timestamps, values, 1000)
+        np.testing.assert_allclose(grid, [0, 1000, 2000, 3000, 4000])
+        np.testing.assert_allclose(resampled, [0.0, 1.0, 1 + 2 * 1000 / 1900,
+                                               3.0 + 100 / 1100, 4.0])
+
+
+@unittest.skipUnless(have_numpy(), "needs numpy")
+class CrossCorrelationTest(unittest.TestCase):
+    """cross_correlation() against summing lagged products directly."""
+
+    def setUp(self):
+        rng = np.random.default_rng(8)
+        driver = np.cumsum(rng.normal(0, 1, 600))
+        # voltage follows temperature by 12 samples; rssi_315 is unrelated.
+        self.data = {
+            'temperature': driver + rng.normal(0, 0.5, 600),
+            'voltage': np.roll(driver, 12) * -0.01 + rng.normal(0, 0.002, 600),
+            'rssi_315': rng.normal(-99.4, 2.75, 600),
+        }
+
+    def naive(self, a, b, lag):
+        a = (a - a.mean()) / a.std()
+        b = (b - b.mean()) / b.std()
+        n = len(a)
+        if lag >= 0:
+            return float(np.sum(a[lag:] * b[:n - lag]) / n)
+        return float(np.sum(a[:n + lag] * b[-lag:]) / n)
+
+    def test_matches_naive(self):
+        result = cross_correlation(self.data, 40)
+        self.assertEqual(set(result), {('rssi_315', 'temperature'), ('rssi_315', 'voltage'),
+                                       ('temperature', 'voltage')})
+        for (a, b), r in result.items():
+            self.assertEqual(len(r), 81)
+            for lag in (-40, -12, -1, 0, 1, 12, 40):
+                self.assertAlmostEqual(r[40 + lag], self.naive(self.data[a], self.data[b], lag),
+                                       places=9)
+
+    def test_peak_lag_and_sign(self):
+        lag, peak, _ = peak_correlation(cross_correlation(self.data, 40)[('temperature', 'voltage')])
+        # temperature leads voltage by 12 samples, anti-correlated.
+        self.assertEqual(lag, -12)
+        self.assertLess(peak, -0.9)
+
+    def test_constant_column_is_left_out(self):
+        data = dict(self.data, voltage=np.full(600, 4.1))
+        self.assertEqual(list(cross_correlation(data, 10)), [('rssi_315', 'temperature')])
+
+
+@unittest.skipUnless(have_numpy(), "needs numpy")
+class ChangepointTest(unittest.TestCase):
+
+    def test_constant_series_has_no_change(self):
+        x = np.full(20000, 100.0)
+        self.assertEqual(noise_sigma(x), 0.0)
+        self.assertEqual(binary_segmentation(x), [])
+        self.assertEqual(cusum_alarms(x)[1], [])
+
+    def test_constant_series_with_one_step(self):
+        # Most block means are identical, so the MAD of their differences is 0.
+        x = np.concatenate((np.full(52517, 0.1), np.full(47483, 0.3)))
+        self.assertGreater(noise_sigma(x), 0.0)
+        self.assertEqual(binary_segmentation(x), [52517])
+        self.assertEqual([direction for _, _, direction in cusum_alarms(x)[1]], [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Tests for the binary column cache: appends, invalidation and bad-cell masks.
+
+Run from this directory with `python -m unittest test_column_cache`.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import column_cache
+from fake_flipper import generate_sensor_log
+from sensor_log import have_numpy, load_columns, np
+
+COLUMNS = ('timestamp_ms', 'sample_num', 'rssi_315', 'temperature', 'phi_current')
+
+
+@unittest.skipUnless(have_numpy(), "needs numpy")
+class ColumnCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'sensor_log.csv')
+        self.log = generate_sensor_log(300, seed=3)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, data, mtime_ns=None):
+        with open(self.path, 'wb') as f:
+            f.write(data)
+        if mtime_ns is not None:
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def assertMatchesScan(self, columns=COLUMNS):
+        """The cached columns hold what the masked scan reads from the text."""
+        cached = column_cache.load_cached_columns(self.path, columns)
+        scanned = load_columns(self.path, columns, engine='masked')
+        for column in columns:
+            want = scanned[column]
+            got = np.ma.asarray(cached[column])
+            self.assertEqual(len(got), len(want), column)
+            np.testing.assert_array_equal(np.ma.getmaskarray(got), np.ma.getmaskarray(want))
+            np.testing.assert_array_equal(
+                np.ma.filled(got, 0).astype(np.float32),
+                np.ma.filled(want, 0).astype(np.float32))
+
+    def test_append_parses_only_the_new_rows(self):
+        # Cut mid-line: the torn row is left for the next update.
+        cut = len(self.log) * 2 // 3
+        self.write(self.log[:cut])
+        meta = column_cache.update_cache(self.path, COLUMNS)
+        parsed = meta['parsed_bytes']
+        self.assertEqual(self.log[parsed - 1:parsed], b'\n')
+        self.assertMatchesScan()
+
+        self.write(self.log)
+        with mock.patch.object(column_cache, '_append_rows',
+                               wraps=column_cache._append_rows) as append:
+            meta = column_cache.update_cache(self.path, COLUMNS)
+        self.assertEqual(append.call_count, 1)
+        self.assertEqual(append.call_args.args[5], parsed)
+        self.assertEqual(meta['rows'], 300)
+        self.assertMatchesScan()
+
+    def test_same_size_rewrite_rebuilds(self):
+        # Long enough that the edit is outside both fingerprinted blocks.
+        log = generate_sensor_log(2000, seed=3)
+        self.write(log, mtime_ns=10**18)
+        column_cache.update_cache(self.path, COLUMNS)
+        # Same length, different digits in one row.
+        lines = log.split(b'\n')
+        lines[1000] = lines[1000].replace(b',1000,', b',7777,', 1)
+        self.write(b'\n'.join(lines), mtime_ns=2 * 10**18)
+        self.assertMatchesScan()
+
+    def test_truncate_rebuilds(self):
+        self.write(self.log)
+        column_cache.update_cache(self.path, COLUMNS)
+        self.write(self.log[:self.log.index(b'\n', len(self.log) // 3) + 1])
+        meta = column_cache.update_cache(self.path, COLUMNS)
+        self.assertLess(meta['rows'], 300)
+        self.assertMatchesScan()
+
+    def test_truncate_and_regrow_rebuilds(self):
+        self.write(self.log)
+        column_cache.update_cache(self.path, COLUMNS)
+        self.write(generate_sensor_log(400, seed=4))
+        self.assertMatchesScan()
+
+    def test_bad_cells_are_masked_like_the_scan(self):
+        lines = self.log.split(b'\n')
+        lines[5] = lines[5].replace(b',', b',xx', 3)
+        lines[9] = lines[9].rsplit(b',', 5)[0] + b',nan,1,2,3,4'
+        self.write(b'\n'.join(lines))
+        meta = column_cache.update_cache(self.path, COLUMNS)
+        self.assertTrue(meta['invalid'])
+        self.assertMatchesScan()
+
+    def test_new_column_lines_up_with_cached_rows(self):
+        lines = self.log.split(b'\n')
+        lines[7] = lines[7].replace(b',', b',?', 1)
+        self.write(b'\n'.join(lines))
+        column_cache.update_cache(self.path, COLUMNS[:2])
+        self.assertMatchesScan(COLUMNS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Tests for merging several logs into one timestamp-ordered stream.
+
+Run from this directory with `python -m unittest test_log_merge`.
+"""
+
+import os
+import tempfile
+import unittest
+
+from fake_flipper import LOG_HEADER, generate_sensor_log
+from log_merge import find_logs, merge_logs, merged_stats, session_names
+from log_stats import RunningStats
+
+COLUMNS = ('rssi_315', 'phi_current')
+
+
+class MergeLogsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # Interleaved sessions on two devices; the third shares timestamps
+        # with the first, and one of its rows has a bad cell.
+        logs = {
+            os.path.join('A', 'sensor_log.csv'): generate_sensor_log(200, seed=1, interval_ms=1000),
+            os.path.join('B', 'sensor_log.csv'): generate_sensor_log(300, seed=2, interval_ms=700),
+            os.path.join('B', 'old.csv'): generate_sensor_log(100, seed=1, interval_ms=1000),
+        }
+        lines = logs[os.path.join('B', 'old.csv')].split(b'\n')
+        fields = lines[10].split(b',')
+        fields[2] = b'?'  # rssi_315
+        lines[10] = b','.join(fields)
+        logs[os.path.join('B', 'old.csv')] = b'\n'.join(lines)
+        for name, data in logs.items():
+            path = os.path.join(self.tmp.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+        self.paths = find_logs(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def rows(self, path):
+        with open(path) as f:
+            header = f.readline().strip().split(',')
+            return [dict(zip(header, line.strip().split(','))) for line in f]
+
+    def test_finds_and_names_every_log(self):
+        self.assertEqual(len(self.paths), 3)
+        self.assertEqual(session_names(self.paths),
+                         [os.path.join('A', 'sensor_log'), os.path.join('B', 'old'),
+                          os.path.join('B', 'sensor_log')])
+
+    def test_timestamp_order_with_ties_by_session(self):
+        merged = list(merge_logs(self.paths, COLUMNS))
+        self.assertEqual(len(merged), 600)
+        keys = [(timestamp, session) for timestamp, session, _ in merged]
+        self.assertEqual(keys, sorted(keys))
+        # Every file's rows come through once each, in their own order.
+        for session, path in enumerate(self.paths):
+            timestamps = [t for t, s, _ in merged if s == session]
+            self.assertEqual(timestamps, [int(row['timestamp_ms']) for row in self.rows(path)])
+
+    def test_pooled_stats_are_the_merge_of_the_sessions(self):
+        sessions, pooled = merged_stats(self.paths, COLUMNS)
+        for column in COLUMNS:
+            everything = RunningStats()
+            for path in self.paths:
+                for row in self.rows(path):
+                    try:
+                        everything.add(float(row[column]))
+                    except ValueError:
+                        pass
+            self.assertEqual(pooled['stats'][column].count, everything.count)
+            self.assertAlmostEqual(pooled['stats'][column].mean, everything.mean)
+            self.assertAlmostEqual(pooled['stats'][column].std, everything.std)
+            self.assertEqual(pooled['sketches'][column].count, everything.count)
+        self.assertEqual(sessions[1]['stats']['rssi_315'].count, 99)
+        self.assertEqual(sessions[0]['first_ms'], int(self.rows(self.paths[0])[0]['timestamp_ms']))
+
+    def test_header_only_log(self):
+        path = os.path.join(self.tmp.name, 'empty.csv')
+        with open(path, 'w') as f:
+            f.write(LOG_HEADER)
+        sessions, _ = merged_stats([path], COLUMNS)
+        self.assertIsNone(sessions[0]['first_ms'])
+
+
+if __name__ == '__main__':
+    unittest.main()
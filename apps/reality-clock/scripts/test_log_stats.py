@@ -0,0 +1,65 @@
+"""
+Tests for the streaming aggregates: KLL quantile sketches.
+
+Run from this directory with `python -m unittest test_log_stats`.
+"""
+
+import bisect
+import random
+import unittest
+
+from log_stats import KLL_K, KllSketch
+
+QUANTILES = [i / 100 for i in range(1, 100)]
+RANK_ERROR = 2 / KLL_K  # the docstring's ~1.7/k, with some slack
+
+
+def rank_errors(sketch, ordered):
+    """|rank of each estimated quantile / n - q| against the sorted data."""
+    n = len(ordered)
+    return [abs(bisect.bisect_left(ordered, estimate) / n - q)
+            for q, estimate in zip(QUANTILES, sketch.quantiles(QUANTILES))]
+
+
+class KllSketchTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(11)
+        self.values = [rng.gauss(-96.0, 1.65) for _ in range(100000)]
+        self.ordered = sorted(self.values)
+
+    def test_rank_error_bound(self):
+        sketch = KllSketch()
+        for value in self.values:
+            sketch.add(value)
+        self.assertLessEqual(max(rank_errors(sketch, self.ordered)), RANK_ERROR)
+        self.assertLess(sketch.size, 4 * KLL_K)
+        self.assertEqual(sketch.quantiles([0, 1]), [self.ordered[0], self.ordered[-1]])
+
+    def test_add_many_matches_the_bound(self):
+        sketch = KllSketch.from_values(self.values)
+        self.assertEqual(sketch.count, len(self.values))
+        self.assertLessEqual(max(rank_errors(sketch, self.ordered)), RANK_ERROR)
+
+    def test_merge(self):
+        # Uneven parts from different distributions, like per-session sketches.
+        rng = random.Random(12)
+        shifted = [rng.gauss(-90.0, 3.0) for _ in range(7000)]
+        parts = [self.values[:1000], self.values[1000:60000], self.values[60000:], shifted, []]
+        merged = KllSketch()
+        for part in parts:
+            merged.merge(KllSketch.from_values(part))
+        pooled = sorted(self.values + shifted)
+        self.assertEqual(merged.count, len(pooled))
+        self.assertEqual((merged.min, merged.max), (pooled[0], pooled[-1]))
+        self.assertLessEqual(max(rank_errors(merged, pooled)), RANK_ERROR)
+
+    def test_round_trip(self):
+        sketch = KllSketch.from_values(self.values[:5000])
+        copy = KllSketch.from_dict(sketch.to_dict())
+        self.assertEqual(copy.quantiles(QUANTILES), sketch.quantiles(QUANTILES))
+        self.assertEqual(KllSketch.from_dict(KllSketch().to_dict()).quantiles([0.5]), [None])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+Tests for the incremental tail sync and the resumable chunked download
+against fake_flipper.
+
+Run from this directory with `python -m unittest test_log_sync`.
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import log_sync
+from fake_flipper import FakeFlipper, generate_sensor_log
+from flipper_cli import LOG_REMOTE_PATH, FlipperCliError, FlipperCliSession
+
+try:
+    import serial  # noqa: F401
+except ImportError:
+    serial = None
+
+CHUNK_SIZE = 4096
+
+
+@unittest.skipIf(serial is None, "needs pyserial")
+class FlipperTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'sensor_log.csv')
+        self.log = generate_sensor_log(600, seed=5)
+        self.fake = FakeFlipper({LOG_REMOTE_PATH: b''}).start()
+        self.reads = mock.patch.object(self.fake, '_cmd_read', wraps=self.fake._cmd_read).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        self.fake.stop()
+        self.tmp.cleanup()
+
+    def put(self, data, timestamp=None):
+        self.fake.put_file(LOG_REMOTE_PATH, data)
+        if timestamp is not None:
+            self.fake.timestamps[LOG_REMOTE_PATH] = timestamp
+
+    def local(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+
+class SyncLogTailTest(FlipperTestCase):
+
+    def sync(self):
+        self.reads.reset_mock()
+        with FlipperCliSession(self.fake.port) as cli, contextlib.redirect_stdout(io.StringIO()):
+            return log_sync.sync_log_tail(cli.ser, self.path, 'FLIP1')
+
+    def test_appends_only_new_bytes(self):
+        self.put(self.log[:20000], timestamp=1)
+        self.assertEqual(self.sync(), 20000)
+        self.put(self.log, timestamp=2)
+        self.assertEqual(self.sync(), len(self.log) - 20000)
+        self.assertEqual(self.local(), self.log)
+        self.assertEqual(self.sync(), 0)
+        self.assertEqual(self.reads.call_count, 0)
+
+    def test_rewritten_log_is_read_once(self):
+        self.put(self.log[:20000], timestamp=1)
+        self.sync()
+        # The app restarted: truncated, then grew past the old size.
+        rewritten = generate_sensor_log(600, seed=6)
+        self.put(rewritten, timestamp=2)
+        self.assertEqual(self.sync(), len(rewritten))
+        self.assertEqual(self.reads.call_count, 1)
+        self.assertEqual(self.local(), rewritten)
+        self.assertFalse(os.path.exists(self.path + '.sync.part'))
+
+    def test_shrunk_log_is_replaced(self):
+        self.put(self.log, timestamp=1)
+        self.sync()
+        self.put(self.log[:5000], timestamp=2)
+        self.assertEqual(self.sync(), 5000)
+        self.assertEqual(self.local(), self.log[:5000])
+
+    def test_other_device_starts_over(self):
+        self.put(self.log[:20000], timestamp=1)
+        self.sync()
+        with FlipperCliSession(self.fake.port) as cli, contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(log_sync.sync_log_tail(cli.ser, self.path, 'FLIP2'), 20000)
+
+
+class ChunkedDownloadTest(FlipperTestCase):
+
+    def download(self, max_passes=5):
+        with FlipperCliSession(self.fake.port) as cli, contextlib.redirect_stdout(io.StringIO()):
+            return log_sync.download_log_chunked(cli.ser, self.path, chunk_size=CHUNK_SIZE,
+                                                 max_passes=max_passes)
+
+    def replug(self):
+        """A Flipper that lost the host mid-transfer is back at the prompt."""
+        self.fake.stop()
+        self.fake = FakeFlipper(self.fake.files).start()
+
+    def interrupt_after(self, chunks):
+        """Make the next download fail after `chunks` chunks arrived."""
+        read_chunk = log_sync._read_chunk
+        calls = []
+
+        def flaky(ser, size):
+            if len(calls) == chunks:
+                raise FlipperCliError("unplugged")
+            calls.append(size)
+            return read_chunk(ser, size)
+        return mock.patch.object(log_sync, '_read_chunk', flaky)
+
+    def test_resumes_after_interruption(self):
+        self.put(self.log)
+        with self.interrupt_after(5), self.assertRaises(FlipperCliError):
+            self.download()
+        self.assertTrue(os.path.exists(self.path + '.state.json'))
+        self.replug()
+        with mock.patch.object(log_sync, '_transfer_pass', wraps=log_sync._transfer_pass) as passes:
+            self.assertTrue(self.download())
+        self.assertEqual(passes.call_count, 1)
+        self.assertEqual(self.local(), self.log)
+        self.assertFalse(os.path.exists(self.path + '.state.json'))
+
+    def test_resumes_after_the_log_grew(self):
+        # A full pass that ends in a partial chunk, then the connection drops.
+        self.put(self.log[:10000])
+        with mock.patch.object(log_sync, 'drain_to_prompt', side_effect=FlipperCliError("unplugged")):
+            with self.assertRaises(FlipperCliError):
+                self.download()
+        self.put(self.log)
+        with mock.patch.object(log_sync, '_transfer_pass', wraps=log_sync._transfer_pass) as passes:
+            self.assertTrue(self.download())
+        self.assertEqual(passes.call_count, 1)
+        self.assertEqual(self.local(), self.log)
+
+    def test_corrupted_chunk_is_refetched(self):
+        self.put(self.log)
+        self.fake.corrupt = 0.01
+        with mock.patch.object(log_sync, '_transfer_pass', wraps=log_sync._transfer_pass) as passes:
+            self.assertTrue(self.download(max_passes=10))
+        self.assertGreater(self.fake.corrupted_chunks, 0)
+        self.assertEqual(self.local(), self.log)
+        self.assertLessEqual(passes.call_count, 1 + self.fake.corrupted_chunks)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+"""
+Regression tests for the log loaders: malformed rows, the parallel scan
+and exact percentiles.
+
+Run from this directory with `python -m unittest test_sensor_log`, or all
+the script tests with `python -m unittest discover`.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import parallel_scan
+from fake_flipper import LOG_HEADER, generate_sensor_log
+from log_incremental import update_aggregates
+from log_stats import stream_stats
+from log_view import open_log
+from sensor_log import (
+    exact_percentiles,
+    have_numpy,
+    load_columns,
+    parse_cell,
+    scan_columns_mmap,
+    summarize,
+)
+
+# Row 3 has an unparseable temperature; the final line was torn mid-write.
+TORN_LOG = LOG_HEADER + (
+    "1000,1,-99.10,-96.00,-112.00,31.00,4.100,0.250000,0.250000,0.250000,99.00,98.00\n"
+    "2000,2,-98.10,-95.00,-111.00,31.50,4.000,0.260000,0.250000,0.250000,99.00,97.00\n"
+    "3000,3,-97.10,-94.00,-110.00,xx,4.000,0.270000,0.250000,0.250000,99.00,96.00\n"
+    "4000,4,-96.10,-93.00,-109"
+)
+COLUMNS = ('timestamp_ms', 'rssi_315', 'rssi_433', 'temperature', 'phi_current')
+
+
+class TornRowTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'sensor_log.csv')
+        with open(self.path, 'w') as f:
+            f.write(TORN_LOG)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_python_engine_keeps_columns_aligned(self):
+        data = load_columns(self.path, COLUMNS, engine='python')
+        self.assertEqual({len(column) for column in data.values()}, {2})
+        self.assertEqual(list(data['timestamp_ms']), [1000, 2000])
+        self.assertEqual(list(data['rssi_433']), [-96.0, -95.0])
+
+    def test_stream_skips_only_the_bad_cell(self):
+        stats = stream_stats(self.path, COLUMNS)
+        self.assertEqual(stats['rssi_315'].count, 3)
+        self.assertEqual(stats['temperature'].count, 2)
+        self.assertAlmostEqual(stats['phi_current'].mean, 0.26)
+        self.assertAlmostEqual(stats['temperature'].mean, 31.25)
+
+    def test_incremental_matches_stream(self):
+        state, rows = update_aggregates(self.path, columns=COLUMNS)
+        stream = stream_stats(self.path, COLUMNS)
+        self.assertEqual(rows, 3)
+        for column in COLUMNS:
+            self.assertEqual(state['stats'][column].count, stream[column].count)
+            self.assertAlmostEqual(state['stats'][column].mean, stream[column].mean)
+
+    def test_incremental_keeps_each_device(self):
+        update_aggregates(self.path, 'A', COLUMNS)
+        update_aggregates(self.path, 'B', COLUMNS)
+        state, rows = update_aggregates(self.path, 'A', COLUMNS)
+        self.assertEqual((rows, state['rows']), (0, 3))
+
+    @unittest.skipUnless(have_numpy(), "needs numpy")
+    def test_masked_engine_matches_stream(self):
+        data = load_columns(self.path, COLUMNS, engine='masked')
+        stream = stream_stats(self.path, COLUMNS)
+        for column in COLUMNS:
+            valid = data[column].compressed()
+            self.assertEqual(len(valid), stream[column].count)
+            self.assertAlmostEqual(float(valid.mean()), stream[column].mean)
+
+    def test_parse_cell_rejects_what_the_scanner_masks(self):
+        self.assertIsNone(parse_cell('timestamp_ms', '-5'))
+        self.assertIsNone(parse_cell('timestamp_ms', '1.5'))
+        self.assertIsNone(parse_cell('phi_current', 'nan'))
+        self.assertIsNone(parse_cell('phi_current', ''))
+        self.assertEqual(parse_cell('sample_num', '42'), 42)
+        self.assertEqual(parse_cell('rssi_315', '-99.10'), -99.1)
+
+
+class NonFiniteCellTest(unittest.TestCase):
+    """A 'nan' cell is skipped by every engine, not averaged in."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'sensor_log.csv')
+        with open(self.path, 'w') as f:
+            # Complete rows only, so loadtxt doesn't bail out on a torn line.
+            f.write(TORN_LOG.rsplit('\n', 1)[0].replace(',xx,', ',31.75,')
+                    .replace('0.260000,0.25', 'nan,0.25', 1) + '\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_engines_agree(self):
+        stream = stream_stats(self.path, COLUMNS)
+        self.assertEqual(stream['phi_current'].count, 2)
+        self.assertAlmostEqual(stream['phi_current'].mean, 0.26)
+        engines = ['python']
+        if have_numpy():
+            engines += ['numpy', 'mmap', 'masked']
+        for engine in engines:
+            data = load_columns(self.path, COLUMNS, engine=engine)
+            phi = summarize(data['phi_current'])
+            self.assertEqual(phi['count'], 2, engine)
+            self.assertAlmostEqual(phi['mean'], 0.26, msg=engine)
+            if engine in ('numpy', 'masked'):
+                # Only the bad cell is left out; the rest of its row counts.
+                self.assertEqual(summarize(data['rssi_315'])['count'], 3, engine)
+
+    @unittest.skipUnless(have_numpy(), "needs numpy")
+    def test_column_cache_skips_the_cell(self):
+        phi = open_log(self.path, ['phi_current'])['phi_current']
+        self.assertEqual(summarize(phi)['count'], 2)
+        self.assertAlmostEqual(summarize(phi)['mean'], 0.26, places=6)
+
+
+@unittest.skipUnless(have_numpy(), "needs numpy")
+class ParallelScanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'sensor_log.csv')
+        lines = generate_sensor_log(3000, seed=7).split(b'\n')
+        lines[100] = lines[100].replace(b',', b',x', 2)  # bad cells
+        lines[2000] = lines[2000][:20]  # a row torn mid-write, then more rows
+        with open(self.path, 'wb') as f:
+            f.write(b'\n'.join(lines))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_matches_the_mmap_scan(self):
+        # Small ranges, so even this log is split between several workers.
+        with mock.patch.object(parallel_scan, 'MIN_RANGE_SIZE', 4096):
+            self.assertGreater(len(parallel_scan._split(self.path, 2)[1]), 2)
+            data, stats, sketches = parallel_scan.scan_columns_parallel(self.path, COLUMNS,
+                                                                        workers=2)
+        want = scan_columns_mmap(self.path, COLUMNS)
+        for column in COLUMNS:
+            self.assertEqual(data[column].dtype, want[column].dtype)
+            self.assertEqual(data[column].tolist(), want[column].tolist())
+            reference = summarize(want[column])
+            self.assertEqual(stats[column].count, reference['count'])
+            self.assertEqual(stats[column].min, reference['min'])
+            self.assertEqual(stats[column].max, reference['max'])
+            self.assertAlmostEqual(stats[column].mean, reference['mean'], places=6)
+            self.assertAlmostEqual(stats[column].std, reference['std'], places=6)
+            self.assertEqual(sketches[column].count, reference['count'])
+
+
+class ExactPercentilesTest(unittest.TestCase):
+
+    def test_interpolates_like_numpy(self):
+        self.assertEqual(exact_percentiles([4, 1, 3, 2], [0, 25, 50, 100]), [1, 1.75, 2.5, 4])
+        self.assertIsNone(exact_percentiles([], [50]))
+
+    @unittest.skipUnless(have_numpy(), "needs numpy")
+    def test_arrays_match_lists(self):
+        import numpy as np
+        values = [0.25, 0.26, 0.31, 0.2, 0.27]
+        array = np.ma.MaskedArray(values + [99.0], mask=[False] * 5 + [True])
+        for got, want in zip(exact_percentiles(array, [5, 50, 95]),
+                             exact_percentiles(values, [5, 50, 95])):
+            self.assertAlmostEqual(got, want)
+
+
+if __name__ == '__main__':
+    unittest.main()